@@ -0,0 +1,46 @@
+"""Decode throughput of the parsers, per message family."""
+
+import struct
+
+from thorlabs_apt_protocol.fastpath import decoders
+from thorlabs_apt_protocol.messages import message_class
+from thorlabs_apt_protocol.parsing import id_to_func
+
+from .streams import FAMILIES
+
+
+class DecodeFamily:
+    params = [sorted(FAMILIES)]
+    param_names = ["family"]
+    items = 1000
+
+    def setup(self, family):
+        self.frames = [
+            (struct.unpack_from("<H", f)[0], f) for f in FAMILIES[family]
+        ] * (1000 // len(FAMILIES[family]))
+        self.items = len(self.frames)
+
+    def time_parse(self, family):
+        for msgid, data in self.frames:
+            id_to_func[msgid](data)
+
+
+class HotDecoders:
+    params = [["generic", "generated"]]
+    param_names = ["decoder"]
+
+    def setup(self, decoder):
+        status = [FAMILIES["mot"][0], FAMILIES["mot"][1]]
+        status += [FAMILIES["pz"][0], FAMILIES["quad"][0], FAMILIES["pzmot"][0]]
+        self.frames = [(struct.unpack_from("<H", f)[0], f) for f in status] * 200
+        self.items = len(self.frames)
+
+    def time_decode(self, decoder):
+        if decoder == "generated":
+            for msgid, data in self.frames:
+                decoders[msgid](data)
+        else:
+            for msgid, data in self.frames:
+                dict_ = id_to_func[msgid](data)
+                values = tuple(dict_.values())
+                message_class(msgid, tuple(dict_)[2:])(*values[2:])
@@ -0,0 +1,35 @@
+"""End to end latency against the pseudo-terminal controller emulator."""
+
+import os
+import select
+import tty
+
+import thorlabs_apt_protocol as apt
+from thorlabs_apt_protocol.emulator import BAYS, EmulatedController, PtyEmulator
+
+
+class EmulatorRoundTrip:
+    params = [[0.0, 0.1]]
+    param_names = ["noise"]
+
+    def setup(self, noise):
+        controller = EmulatedController(address=0x11, bays=BAYS, noise=noise, seed=0)
+        self.emulator = PtyEmulator(controller)
+        self.emulator.start()
+        self.fd = os.open(self.emulator.port, os.O_RDWR | os.O_NOCTTY)
+        tty.setraw(self.fd)
+        self.unpacker = apt.Unpacker(on_error="continue")
+        self.request = apt.mot_req_velparams(dest=0x25, source=0x01, chan_ident=1)
+
+    def teardown(self, noise):
+        os.close(self.fd)
+        self.emulator.stop()
+
+    def time_req_velparams(self, noise):
+        os.write(self.fd, self.request)
+        while True:
+            select.select([self.fd], [], [], 1.0)
+            self.unpacker.feed(os.read(self.fd, 4096))
+            for msg in self.unpacker:
+                if msg.msg == "mot_get_velparams":
+                    return
@@ -0,0 +1,39 @@
+"""Encode throughput of the outgoing message functions."""
+
+import thorlabs_apt_protocol as apt
+
+
+class Encode:
+    items = 1000
+
+    def time_short(self):
+        for _ in range(1000):
+            apt.mot_move_home(dest=0x50, source=0x01, chan_ident=1)
+
+    def time_long(self):
+        for _ in range(1000):
+            apt.mot_set_velparams(
+                dest=0x50,
+                source=0x01,
+                chan_ident=1,
+                min_velocity=0,
+                acceleration=4506,
+                max_velocity=21987328,
+            )
+
+    def time_move_absolute(self):
+        for i in range(1000):
+            apt.mot_move_absolute(dest=0x50, source=0x01, chan_ident=1, position=i)
+
+    def time_movesyncharray(self):
+        points = list(range(60))
+        for _ in range(1000):
+            apt.mot_set_movesyncharray(
+                dest=0x50,
+                source=0x01,
+                array_id=0,
+                channels=1,
+                num_points=30,
+                start_ix=0,
+                time_pos=points,
+            )
@@ -0,0 +1,80 @@
+"""End to end Unpacker throughput on clean, noisy and fragmented streams."""
+
+import io
+import tracemalloc
+
+import thorlabs_apt_protocol as apt
+
+from .streams import FAMILIES, FragmentedReader, clean_stream, frame, noisy_stream
+
+NFRAMES = 2000
+
+
+def _drain(unpacker, file_like):
+    # A short read ends iteration, just as a serial port timeout would
+    n = 0
+    while True:
+        for _ in unpacker:
+            n += 1
+        if file_like.tell() == len(file_like.getbuffer()) and len(unpacker.buf) < 6:
+            return n
+
+
+class UnpackerThroughput:
+    params = [["clean", "noisy", "fragmented"]]
+    param_names = ["stream"]
+    items = NFRAMES
+
+    def setup(self, stream):
+        if stream == "noisy":
+            self.data = noisy_stream(NFRAMES)
+        else:
+            self.data = clean_stream(NFRAMES)
+
+    def _file(self, stream):
+        if stream == "fragmented":
+            return FragmentedReader(self.data)
+        return io.BytesIO(self.data)
+
+    def time_unpack(self, stream):
+        f = self._file(stream)
+        _drain(apt.Unpacker(f, on_error="continue"), f)
+
+    def track_frames(self, stream):
+        f = self._file(stream)
+        return _drain(apt.Unpacker(f, on_error="continue"), f)
+
+
+class UnpackerMemory:
+    def setup(self):
+        self.data = clean_stream(NFRAMES)
+
+    def track_bytes_per_message(self):
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            messages = list(apt.Unpacker(io.BytesIO(self.data), on_error="continue"))
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+        size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+        return size / len(messages)
+
+    track_bytes_per_message.unit = "bytes"  # type: ignore[attr-defined]
+
+
+class IdleStatusUpdates:
+    params = [[False, True]]
+    param_names = ["change_filter"]
+    items = NFRAMES
+
+    def setup(self, change_filter):
+        # Two idle channels of the same controller
+        channel_1 = FAMILIES["mot"][0]
+        channel_2 = frame(0x0491, b"\x02\x00" + channel_1[8:])
+        self.data = (channel_1 + channel_2) * (NFRAMES // 2)
+
+    def time_unpack(self, change_filter):
+        frame_filter = apt.ChangeFilter() if change_filter else None
+        for _ in apt.Unpacker(io.BytesIO(self.data), frame_filter=frame_filter):
+            pass
@@ -0,0 +1,124 @@
+"""
+Run the benchmarks and write the results as JSON.
+
+The benchmark modules follow the `asv <https://asv.readthedocs.io/>`_ conventions
+(``time_*`` and ``track_*`` methods, ``setup``, ``params``) so they can be run by asv
+directly. This runner needs nothing beyond the standard library::
+
+    python -m benchmarks.run -o results.json
+    python -m benchmarks.run -k unpacker
+
+Each result records the benchmark name, its parameters and either the best time per
+call (with derived ``items_per_second`` where the class declares ``items``) or the
+tracked value.
+"""
+
+import argparse
+import importlib
+import inspect
+import itertools
+import json
+import pkgutil
+import platform
+import sys
+import timeit
+
+import thorlabs_apt_protocol
+
+
+def _benchmark_classes():
+    import benchmarks
+
+    for info in pkgutil.iter_modules(benchmarks.__path__):
+        if not info.name.startswith("bench_"):
+            continue
+        module = importlib.import_module(f"benchmarks.{info.name}")
+        for name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ == module.__name__:
+                yield f"{info.name[len('bench_'):]}.{name}", cls
+
+
+def _param_sets(cls):
+    params = getattr(cls, "params", None)
+    if params is None:
+        return [()]
+    if params and not isinstance(params[0], (list, tuple)):
+        params = [params]
+    return list(itertools.product(*params))
+
+
+def _run_one(cls, method_name, args, repeat):
+    instance = cls()
+    if hasattr(instance, "setup"):
+        instance.setup(*args)
+    method = getattr(instance, method_name)
+    result = {}
+    if method_name.startswith("time_"):
+        timer = timeit.Timer(lambda: method(*args))
+        number, _ = timer.autorange()
+        times = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+        best = min(times)
+        result.update(seconds=best, samples=times)
+        items = getattr(instance, "items", None)
+        if items:
+            result["items_per_second"] = items / best
+    else:
+        result["value"] = method(*args)
+        result["unit"] = getattr(method, "unit", None)
+    if hasattr(instance, "teardown"):
+        instance.teardown(*args)
+    return result
+
+
+def run(pattern="", repeat=5):
+    results = []
+    for cls_name, cls in _benchmark_classes():
+        for method_name in sorted(vars(cls)):
+            if not method_name.startswith(("time_", "track_")):
+                continue
+            name = f"{cls_name}.{method_name}"
+            if pattern not in name:
+                continue
+            for args in _param_sets(cls):
+                entry = {
+                    "name": name,
+                    "params": dict(zip(getattr(cls, "param_names", []), args)),
+                }
+                entry.update(_run_one(cls, method_name, args, repeat))
+                results.append(entry)
+    return {
+        "version": thorlabs_apt_protocol.__version__,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "-k", dest="pattern", default="", help="only run names containing this"
+    )
+    parser.add_argument("-o", dest="output", help="write JSON results to this file")
+    parser.add_argument("-r", dest="repeat", type=int, default=5, help="timing repeats")
+    args = parser.parse_args(argv)
+    report = run(args.pattern, args.repeat)
+    for entry in report["results"]:
+        params = ",".join(str(v) for v in entry["params"].values())
+        label = f"{entry['name']}[{params}]" if params else entry["name"]
+        if "seconds" in entry:
+            extra = (
+                f"  {entry['items_per_second']:12.0f} items/s"
+                if "items_per_second" in entry
+                else ""
+            )
+            print(f"{label:55s} {entry['seconds'] * 1e6:12.1f} us{extra}")
+        else:
+            print(f"{label:55s} {entry['value']:12.1f} {entry['unit'] or ''}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Synthetic APT byte streams used by the benchmarks."""
+
+import io
+import random
+import struct
+from typing import Dict, List, Optional
+
+HOST = 0x01
+CONTROLLER = 0x50
+
+
+def frame(
+    msgid: int,
+    body: Optional[bytes] = None,
+    *,
+    param1: int = 0,
+    param2: int = 0,
+    source: int = CONTROLLER,
+    dest: int = HOST,
+) -> bytes:
+    """Build a controller to host frame, long form if ``body`` is given."""
+    if body is not None:
+        return struct.pack("<HHBB", msgid, len(body), dest | 0x80, source) + body
+    return struct.pack("<HBBBB", msgid, param1, param2, dest, source)
+
+
+# One representative frame per message family, keyed by family name.
+# Each entry is a list so families can contribute short and long messages.
+FAMILIES: Dict[str, List[bytes]] = {
+    "mot": [
+        frame(0x0491, struct.pack("<HlhHL", 1, 204800, -512, 0, 0x80000410)),
+        frame(0x0481, struct.pack("<HllL", 1, 204800, 204790, 0x80000410)),
+        frame(0x0415, struct.pack("<H3l", 1, 0, 4506, 21987328)),
+        frame(0x0464, struct.pack("<HlhHL", 1, 204800, 0, 0, 0x80000410)),
+    ],
+    "pz": [
+        frame(0x0661, struct.pack("<HhhL", 1, 16000, 12000, 0x80000101)),
+        frame(0x0645, struct.pack("<Hh", 1, 16000)),
+    ],
+    "nt": [
+        frame(0x063F, struct.pack("<l", 0x50005)),
+        frame(0x063A, struct.pack("<fHHH", 0.25, 3000, 5, 0)),
+    ],
+    "la": [
+        frame(0x0821, struct.pack("<HHL", 1200, 3400, 0x3)),
+        frame(0x0826, struct.pack("<hHhLL", 1200, 40, 2100, 0, 0x1003)),
+    ],
+    "quad": [
+        frame(0x0881, struct.pack("<hhHhhL", -12, 34, 5000, 100, -100, 0x5)),
+        frame(0x0870, struct.pack("<HhhHhh", 3, -12, 34, 5000, 100, -100)),
+    ],
+    "tec": [
+        frame(0x0861, struct.pack("<hhHL", 250, 2500, 2500, 0x11)),
+        frame(0x0842, struct.pack("<HhhH", 3, 250, 2500, 2500)),
+    ],
+    "pzmot": [
+        frame(0x08E1, struct.pack("<HllL", 1, 1000, 0, 0x80000500)),
+        frame(0x08C2, struct.pack("<HHHll", 7, 1, 110, 1000, 10000)),
+    ],
+}
+
+SHORT_FRAME = frame(0x0212, param1=1, param2=1)
+LONG_FRAME = frame(
+    0x0006,
+    struct.pack(
+        "<l8sH4B48s12sHHH",
+        83000001,
+        b"KDC101\x00\x00",
+        16,
+        0,
+        3,
+        0,
+        2,
+        b"",
+        b"\x00" * 10 + b"\x10\x00",
+        1,
+        0,
+        1,
+    ),
+)
+
+
+def clean_stream(nframes: int, seed: int = 0) -> bytes:
+    """A stream of valid frames drawn from every family."""
+    rng = random.Random(seed)
+    pool = [f for frames in FAMILIES.values() for f in frames]
+    pool += [SHORT_FRAME, LONG_FRAME]
+    return b"".join(rng.choice(pool) for _ in range(nframes))
+
+
+def noisy_stream(nframes: int, noise: float = 0.05, seed: int = 0) -> bytes:
+    """A clean stream with bursts of random bytes between some of the frames."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(nframes):
+        out.append(clean_stream(1, seed=seed + i))
+        if rng.random() < noise:
+            out.append(bytes(rng.randrange(256) for _ in range(rng.randrange(1, 16))))
+    return b"".join(out)
+
+
+class FragmentedReader(io.BytesIO):
+    """A ``BytesIO`` which returns at most ``chunk`` bytes per ``read()``, like a serial port."""
+
+    def __init__(self, data: bytes, chunk: int = 3):
+        super().__init__(data)
+        self.chunk = chunk
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.chunk:
+            size = self.chunk
+        return super().read(size)
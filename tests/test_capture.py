@@ -0,0 +1,59 @@
+import io
+import struct
+
+import thorlabs_apt_protocol as apt
+from thorlabs_apt_protocol.capture import (
+    build_index,
+    decode_capture,
+    decode_capture_parallel,
+)
+
+from benchmarks.streams import SHORT_FRAME, clean_stream, frame
+
+
+def write_capture(tmp_path, data):
+    path = tmp_path / "capture.bin"
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_index():
+    data = clean_stream(100) + b"\x00\x00" + SHORT_FRAME
+    index = build_index(data)
+    messages = list(apt.Unpacker(io.BytesIO(data), on_error="continue"))
+    assert list(index.msgids) == [msg.msgid for msg in messages]
+    assert index.discarded == 2
+
+
+def test_decode_matches_unpacker(tmp_path):
+    data = clean_stream(500)
+    tables = decode_capture(write_capture(tmp_path, data))
+    messages = list(apt.Unpacker(io.BytesIO(data)))
+    assert sum(len(t["frame_offset"]) for t in tables.values()) == len(messages)
+    first = messages[0]
+    table = tables[first.msgid]
+    assert table["frame_offset"][0] == 0
+    for name, value in first._asdict().items():
+        assert table[name][0] == value
+
+
+def test_parallel_matches_serial(tmp_path):
+    path = write_capture(tmp_path, clean_stream(2000))
+    serial = decode_capture(path)
+    parallel = decode_capture_parallel(path, workers=2, shard_size=97)
+    assert parallel == serial
+
+
+def test_empty(tmp_path):
+    path = write_capture(tmp_path, b"")
+    assert decode_capture(path) == {}
+    assert decode_capture_parallel(path, workers=2) == {}
+
+
+def test_short_and_long_forms(tmp_path):
+    short = frame(0x0464, param1=1)
+    long = frame(0x0464, struct.pack("<HlhHL", 1, 100, 0, 0, 0x400))
+    tables = decode_capture(write_capture(tmp_path, long + short + long))
+    table = tables[0x0464]
+    assert table["frame_offset"] == [0, len(long), len(long) + len(short)]
+    assert table["position"] == [100, None, 100]
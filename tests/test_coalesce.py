@@ -0,0 +1,44 @@
+import asyncio
+
+import thorlabs_apt_protocol as apt
+
+
+def test_coalesces_until_deadline():
+    written = []
+    writer = apt.CoalescingWriter(written.append, max_delay=0.001, max_size=64)
+    message = apt.hw_req_info(0x50, 1)
+    writer.write(message, now=0)
+    writer.write(message, now=0.0005)
+    writer.poll(now=0.0009)
+    assert written == []
+    writer.poll(now=0.001)
+    assert written == [message * 2]
+    assert (writer.writes, writer.messages) == (1, 2)
+    assert writer.deadline is None
+
+
+def test_size_and_flush():
+    written = []
+    writer = apt.CoalescingWriter(written.append, max_delay=1, max_size=12)
+    message = apt.hw_req_info(0x50, 1)
+    writer.write(message, now=0)
+    writer.write(message, now=0)
+    assert written == [message * 2]
+    writer.write(message, flush=True, now=0)
+    assert written == [message * 2, message]
+    with writer:
+        writer.write(message, now=0)
+    assert written[-1] == message
+
+
+def test_async_flushes_on_deadline():
+    written = []
+
+    async def main():
+        writer = apt.AsyncCoalescingWriter(written.append, max_delay=0.001)
+        writer.write(apt.hw_req_info(0x50, 1))
+        assert written == []
+        await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    assert written == [apt.hw_req_info(0x50, 1)]
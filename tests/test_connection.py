@@ -0,0 +1,74 @@
+import struct
+
+import thorlabs_apt_protocol as apt
+from thorlabs_apt_protocol.emulator import EmulatedController
+
+
+def velparams(chan, source=0x50):
+    body = struct.pack("<H3l", chan, 0, 10, 20)
+    return struct.pack("<HHBB", 0x0415, len(body), 0x81, source) + body
+
+
+def test_records_requests():
+    conn = apt.Connection()
+    conn.send(apt.mot_req_velparams(0x50, 1, 2), now=0)
+    conn.send(apt.hw_req_info(0x50, 1), now=0)
+    conn.send(apt.mot_move_home(0x50, 1, 1), now=0)
+    pending = conn.sessions[0x50].pending
+    assert [chan for _, _, chan in pending[0x0415]] == [2]
+    # hw_req_info has no channel
+    assert [chan for _, _, chan in pending[0x0006]] == [None]
+    assert conn.sessions[0x50].homing == {1}
+
+
+def test_response_for_other_channel_does_not_resolve():
+    conn = apt.Connection(request_timeout=1.0)
+    conn.send(apt.mot_req_velparams(0x50, 1, 1), now=0)
+    # Unsolicited parameters of channel 2
+    conn.receive_data(velparams(2))
+    assert [e.msg for e in conn.events(now=0.1)] == ["mot_get_velparams"]
+    assert len(conn.sessions[0x50].pending[0x0415]) == 1
+    assert conn.events(now=2) == [apt.RequestTimedOut(0x50, 0x0415, 1)]
+
+
+def test_response_resolves_request():
+    conn = apt.Connection(request_timeout=1.0)
+    conn.send(apt.mot_req_velparams(0x50, 1, 1), now=0)
+    conn.send(apt.mot_req_velparams(0x50, 1, 2), now=0)
+    conn.receive_data(velparams(2) + velparams(1))
+    conn.events(now=0.1)
+    assert not conn.sessions[0x50].pending[0x0415]
+    assert conn.events(now=2) == []
+
+
+def test_emulated_controller():
+    ctl = EmulatedController(channels=2, update_rate=10)
+    conn = apt.Connection()
+    for data in [
+        apt.hw_start_updatemsgs(0x50, 1),
+        apt.mot_req_velparams(0x50, 1, 2),
+        apt.mot_move_home(0x50, 1, 1),
+    ]:
+        ctl.receive_data(conn.send(data, now=0))
+    ctl.tick(0)
+    conn.receive_data(ctl.data_to_send())
+    msgs = [e.msg for e in conn.events(now=0.05)]
+    assert "mot_get_velparams" in msgs and "mot_move_homed" in msgs
+    for k in range(1, 40):
+        ctl.tick(k * 0.1)
+    conn.receive_data(ctl.data_to_send())
+    msgs = [e.msg for e in conn.events(now=4)]
+    assert "mot_get_dcstatusupdate" in msgs
+    session = conn.sessions[0x50]
+    assert session.updates_enabled
+    assert not session.homing
+    assert not session.pending[0x0415]
+    # Updates are acknowledged every second
+    assert conn.acks_due(now=4.5) == apt.mot_ack_dcstatusupdate(0x50, 1)
+    assert conn.acks_due(now=4.6) == b""
+
+
+def test_need_data():
+    conn = apt.Connection()
+    conn.receive_data(b"\x00\xff")
+    assert conn.next_event(now=0) is apt.NEED_DATA
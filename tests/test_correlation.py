@@ -0,0 +1,128 @@
+import asyncio
+import io
+import struct
+import time
+
+import pytest
+
+import thorlabs_apt_protocol as apt
+
+
+def reply(msgid, body, source=0x50):
+    frame = struct.pack("<HHBB", msgid, len(body), 0x81, source) + body
+    (msg,) = list(apt.Unpacker(io.BytesIO(frame)))
+    return msg
+
+
+def velparams(chan):
+    return reply(0x0415, struct.pack("<H3l", chan, 0, 10, 20))
+
+
+def test_request_response_table():
+    assert apt.REQUEST_RESPONSE[0x0414] == 0x0415  # mot_req_velparams
+    assert apt.REQUEST_RESPONSE[0x0871] == 0x0870  # quad_req_* -> quad_get_params
+
+
+def test_matches_channel():
+    written = []
+    correlator = apt.Correlator(written.append)
+    one = correlator.request(apt.mot_req_velparams, 0x50, chan_ident=1)
+    two = correlator.request(apt.mot_req_velparams, 0x50, chan_ident=2)
+    assert written == [
+        apt.mot_req_velparams(0x50, 1, 1),
+        apt.mot_req_velparams(0x50, 1, 2),
+    ]
+    assert correlator.dispatch(velparams(2))
+    assert two.result().chan_ident == 2
+    assert not one.done()
+    assert correlator.dispatch(velparams(1))
+    assert one.result().chan_ident == 1
+
+
+def test_matches_submsgid():
+    correlator = apt.Correlator(lambda data: None)
+    loop = correlator.request(apt.quad_req_loopparams, 0x50)
+    readings = correlator.request(apt.quad_req_readings, 0x50)
+    assert correlator.dispatch(reply(0x0870, struct.pack("<HhhHhh", 3, 1, 2, 3, 4, 5)))
+    assert readings.result().submsgid == 3
+    assert not loop.done()
+    assert correlator.dispatch(reply(0x0870, struct.pack("<HHHH", 1, 10, 20, 30)))
+    assert loop.result().submsgid == 1
+
+
+def test_unmatched():
+    unmatched = []
+    correlator = apt.Correlator(lambda data: None, on_unmatched=unmatched.append)
+    msg = velparams(1)
+    assert not correlator.dispatch(msg)
+    assert unmatched == [msg]
+
+
+def test_timeout():
+    correlator = apt.Correlator(lambda data: None, timeout=1.0)
+    future = correlator.request(apt.mot_req_velparams, 0x50, chan_ident=1)
+    correlator.expire(now=0.0)
+    assert not future.done()
+    correlator.expire(now=float("inf"))
+    with pytest.raises(TimeoutError):
+        future.result()
+
+
+def test_response_without_channel():
+    correlator = apt.Correlator(lambda data: None)
+    future = correlator.request(apt.mot_req_adcinputs, 0x50, chan_ident=1)
+    assert correlator.dispatch(reply(0x042C, struct.pack("<HH", 0, 2**14)))
+    assert future.result().adc_input2 == 2.5
+    assert not correlator._pending
+
+
+def test_timed_out_requests_are_forgotten():
+    correlator = apt.Correlator(lambda data: None, timeout=1.0)
+    futures = [
+        correlator.request(apt.mot_req_velparams, 0x50, chan_ident=1)
+        for _ in range(1000)
+    ]
+    correlator.expire(now=time.monotonic() + 1.5)
+    assert all(isinstance(f.exception(), TimeoutError) for f in futures)
+    assert not correlator._pending
+    # Once their responses can no longer arrive, nothing is left
+    correlator.expire(now=time.monotonic() + 10)
+    assert not correlator._late
+
+
+def test_late_response():
+    unmatched = []
+    correlator = apt.Correlator(
+        lambda data: None, timeout=1.0, on_unmatched=unmatched.append
+    )
+    old = correlator.request(apt.mot_req_velparams, 0x50, chan_ident=1)
+    correlator.expire(now=time.monotonic() + 1.5)
+    assert old.done()
+    new = correlator.request(apt.mot_req_velparams, 0x50, chan_ident=1)
+    # The response to the old request does not resolve the new one
+    late = velparams(1)
+    assert not correlator.dispatch(late)
+    assert unmatched == [late]
+    assert not new.done()
+    assert correlator.dispatch(velparams(1))
+    assert new.result().chan_ident == 1
+
+
+def test_not_a_request():
+    with pytest.raises(ValueError):
+        apt.Correlator(lambda data: None).request(
+            apt.mot_move_stop, 0x50, chan_ident=1, stop_mode=2
+        )
+
+
+def test_async():
+    async def main():
+        correlator = apt.AsyncCorrelator(lambda data: None, timeout=0.01)
+        future = correlator.request(apt.mot_req_velparams, 0x50, chan_ident=1)
+        correlator.dispatch(velparams(1))
+        assert (await future).chan_ident == 1
+        late = correlator.request(apt.mot_req_velparams, 0x50, chan_ident=1)
+        with pytest.raises(asyncio.TimeoutError):
+            await late
+
+    asyncio.run(main())
@@ -0,0 +1,72 @@
+import io
+import struct
+
+import thorlabs_apt_protocol as apt
+
+from benchmarks.streams import frame
+
+
+def dcstatus(bits, chan=1, source=0x50):
+    return frame(0x0491, struct.pack("<HlhHL", chan, 0, 0, 0, bits), source=source)
+
+
+def test_first_frame_has_no_edges():
+    detector = apt.StatusEdgeDetector()
+    assert detector.feed_frame(dcstatus(0x80000410), timestamp=0) == []
+    assert detector.feed_frame(dcstatus(0x80000410), timestamp=1) == []
+
+
+def test_rising_and_falling_edges():
+    detector = apt.StatusEdgeDetector()
+    detector.feed_frame(dcstatus(0x80000410), timestamp=0)
+    # Stops moving forward and reaches the forward limit
+    edges = detector.feed_frame(dcstatus(0x80000401), timestamp=1)
+    assert edges == [
+        apt.StatusEdge(0x50, 1, "forward_limit_switch", True, 1),
+        apt.StatusEdge(0x50, 1, "moving_forward", False, 1),
+    ]
+
+
+def test_frame_filter():
+    edges = []
+    detector = apt.StatusEdgeDetector(on_edge=edges.append, clock=lambda: 5.0)
+    data = dcstatus(0x80000400) + dcstatus(0x80000600) + dcstatus(0x80000400)
+    messages = list(apt.Unpacker(io.BytesIO(data), frame_filter=detector))
+    # Every message is let through
+    assert len(messages) == 3
+    assert edges == [
+        apt.StatusEdge(0x50, 1, "homing", True, 5.0),
+        apt.StatusEdge(0x50, 1, "homing", False, 5.0),
+    ]
+
+
+def test_short_move_completed():
+    detector = apt.StatusEdgeDetector()
+    detector.feed_frame(dcstatus(0x80000410))
+    # Short form end of move messages have no status bits
+    assert detector.feed_frame(frame(0x0464, param1=1)) == []
+    assert detector(frame(0x0464, param1=1))
+    # A long form one does
+    completed = frame(0x0464, struct.pack("<HlhHL", 1, 0, 0, 0, 0x80000400))
+    (edge,) = detector.feed_frame(completed, timestamp=2)
+    assert (edge.name, edge.rising) == ("moving_forward", False)
+
+
+def test_state_per_channel():
+    detector = apt.StatusEdgeDetector()
+    detector.feed_frame(dcstatus(0x80000000, chan=1))
+    detector.feed_frame(dcstatus(0x80000000, chan=2))
+    detector.feed_frame(dcstatus(0x80000000, chan=1, source=0x21))
+    assert detector.feed_frame(dcstatus(0x80000000, chan=2)) == []
+    (edge,) = detector.feed_frame(dcstatus(0x80000001, chan=2), timestamp=3)
+    assert (edge.source, edge.chan_ident, edge.name) == (
+        0x50,
+        2,
+        "forward_limit_switch",
+    )
+    # Other channels and sources keep their own state
+    assert detector.feed_frame(dcstatus(0x80000000, chan=1)) == []
+    (edge,) = detector.feed_frame(dcstatus(0x80000001, chan=1, source=0x21), 4)
+    assert edge.source == 0x21
+    detector.reset()
+    assert detector.feed_frame(dcstatus(0x80000000, chan=2)) == []
@@ -0,0 +1,81 @@
+import io
+import struct
+
+import thorlabs_apt_protocol as apt
+from thorlabs_apt_protocol.emulator import BAYS, RACK, EmulatedController
+
+
+def exchange(controller, data):
+    controller.receive_data(data)
+    return list(apt.Unpacker(io.BytesIO(controller.data_to_send())))
+
+
+def test_hw_req_info():
+    controller = EmulatedController(channels=2)
+    (info,) = exchange(controller, apt.hw_req_info(0x50, 1))
+    assert info.msg == "hw_get_info"
+    assert (info.source, info.dest) == (0x50, 0x01)
+    assert info.model_number.startswith(b"KDC101")
+    assert info.nchs == 2
+    # Other addresses are ignored
+    assert exchange(controller, apt.hw_req_info(0x21, 1)) == []
+
+
+def test_rack():
+    controller = EmulatedController(address=RACK, bays=BAYS[:3])
+    (info,) = exchange(controller, apt.hw_req_info(RACK, 1))
+    assert info.nchs == 3
+    used = exchange(
+        controller, b"".join(apt.rack_req_bayused(RACK, 1, i) for i in range(4))
+    )
+    assert [m.occupied for m in used] == [True, True, True, False]
+    (velparams,) = exchange(controller, apt.mot_req_velparams(0x22, 1, 1))
+    assert (velparams.source, velparams.chan_ident) == (0x22, 1)
+    assert exchange(controller, apt.mot_req_velparams(0x24, 1, 1)) == []
+
+
+def test_move_completes():
+    controller = EmulatedController(speed=1000)
+    assert exchange(controller, apt.mot_move_absolute(0x50, 1, 1, 500)) == []
+    controller.tick(0)
+    controller.tick(0.25)
+    assert list(apt.Unpacker(io.BytesIO(controller.data_to_send()))) == []
+    controller.tick(0.5)
+    (completed,) = apt.Unpacker(io.BytesIO(controller.data_to_send()))
+    assert completed.msg == "mot_move_completed"
+    assert completed.position == 500
+    (counter,) = exchange(controller, apt.mot_req_poscounter(0x50, 1, 1))
+    assert counter.position == 500
+
+
+def test_update_rate():
+    controller = EmulatedController(channels=2, update_rate=10)
+    controller.tick(0)
+    assert controller.data_to_send() == b""
+    controller.receive_data(apt.hw_start_updatemsgs(0x50, 1))
+    for k in range(100):
+        controller.tick(k * 0.01)
+    updates = list(apt.Unpacker(io.BytesIO(controller.data_to_send())))
+    assert {m.msg for m in updates} == {"mot_get_dcstatusupdate"}
+    assert len(updates) == 2 * 10
+    controller.receive_data(apt.hw_stop_updatemsgs(0x50, 1))
+    controller.tick(2)
+    assert controller.data_to_send() == b""
+
+
+def test_noise():
+    controller = EmulatedController(noise=0.5, seed=1)
+    for _ in range(100):
+        controller.receive_data(apt.mot_req_dcstatusupdate(0x50, 1, 1))
+    data = controller.data_to_send()
+    assert len(data) > 100 * 20
+    unpacker = apt.Unpacker(io.BytesIO(data), on_error="ignore")
+    assert sum(m.msg == "mot_get_dcstatusupdate" for m in unpacker) >= 90
+
+
+def test_garbage_header_resyncs():
+    controller = EmulatedController()
+    # Long form header claiming 0xFFFF bytes of data
+    controller.receive_data(struct.pack("<HHBB", 0x0413, 0xFFFF, 0xD0, 0x01))
+    (info,) = exchange(controller, apt.hw_req_info(0x50, 1))
+    assert info.msg == "hw_get_info"
@@ -0,0 +1,70 @@
+import io
+import struct
+
+import pytest
+
+import thorlabs_apt_protocol as apt
+from benchmarks.streams import FAMILIES, clean_stream, frame
+
+np = pytest.importorskip("numpy")
+from thorlabs_apt_protocol import export  # noqa: E402
+
+
+def messages(data):
+    return list(apt.Unpacker(io.BytesIO(data)))
+
+
+@pytest.mark.parametrize(
+    "msgid", [0x0481, 0x0491, 0x0661, 0x0821, 0x0826, 0x0861, 0x063A, 0x0881]
+)
+def test_layouts_match_parsers(msgid):
+    frames = [
+        f
+        for family in FAMILIES.values()
+        for f in family
+        if f[:2] == struct.pack("<H", msgid)
+    ]
+    if not frames:
+        body = bytes(range(1, export._LAYOUT_DTYPES[msgid].itemsize - 5))
+        frames = [frame(msgid, body)]
+    columns = export._decode_batch(msgid, frames * 3)
+    (msg,) = messages(frames[0])
+    fields = msg._asdict()
+    for name, column in columns.items():
+        assert len(column) == 3
+        if name == "status_bits":
+            offset = apt.parsing.STATUS_MESSAGES[msgid][1]
+            assert column[0] == struct.unpack_from("<L", frames[0], offset)[0]
+        else:
+            assert column[0] == pytest.approx(fields[name]), name
+
+
+def test_npz(tmp_path):
+    data = clean_stream(300)
+    path = str(tmp_path / "out.npz")
+    with export.Exporter(path, batch_size=16) as exporter:
+        exporter.consume(apt.Unpacker(io.BytesIO(data), raw=True))
+    decoded = messages(data)
+    with np.load(path) as archive:
+        tec = [m for m in decoded if m.msgid == 0x0861]
+        assert list(archive["tec_get_statusupdate/temp_actual"]) == [
+            m.temp_actual for m in tec
+        ]
+        total = sum(
+            len(archive[key]) for key in archive.files if key.endswith("/source")
+        )
+    assert total == len(decoded)
+
+
+def test_arrow(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    data = clean_stream(300)
+    capture = tmp_path / "capture.bin"
+    capture.write_bytes(data)
+    out = tmp_path / "arrow"
+    export.export_capture(str(capture), str(out), batch_size=16)
+    with pa.ipc.open_file(str(out / "mot_get_dcstatusupdate.arrow")) as reader:
+        table = reader.read_all()
+    expected = [m for m in messages(data) if m.msgid == 0x0491]
+    assert table.num_rows == len(expected)
+    assert table.column("position").to_pylist() == [m.position for m in expected]
@@ -0,0 +1,50 @@
+import struct
+
+import thorlabs_apt_protocol as apt
+
+from benchmarks.streams import frame
+
+
+def dcstatus(position, chan=1, source=0x50):
+    body = struct.pack("<HlhHL", chan, position, 0, 0, 0x80000400)
+    return frame(0x0491, body, source=source)
+
+
+def test_drops_identical_updates():
+    change = apt.ChangeFilter()
+    assert change(dcstatus(0))
+    assert not change(dcstatus(0))
+    assert change(dcstatus(1))
+    assert not change(dcstatus(1))
+    assert change(dcstatus(0))
+
+
+def test_state_per_source_and_channel():
+    change = apt.ChangeFilter()
+    assert change(dcstatus(0, chan=1))
+    assert change(dcstatus(0, chan=2))
+    assert change(dcstatus(0, source=0x21))
+    assert not change(dcstatus(0, chan=1))
+    assert not change(dcstatus(0, chan=2))
+    assert not change(dcstatus(0, source=0x21))
+
+
+def test_other_messages_pass():
+    change = apt.ChangeFilter()
+    velparams = frame(0x0415, struct.pack("<H3l", 1, 0, 10, 20))
+    assert change(velparams)
+    assert change(velparams)
+    # Only the message ids given are filtered
+    change = apt.ChangeFilter(msgids=[0x0415])
+    assert change(velparams)
+    assert not change(velparams)
+    assert change(dcstatus(0))
+    assert change(dcstatus(0))
+
+
+def test_reset():
+    change = apt.ChangeFilter()
+    assert change(dcstatus(0))
+    change.reset()
+    assert change(dcstatus(0))
+    assert not change(dcstatus(0))
@@ -0,0 +1,58 @@
+import io
+import struct
+
+import thorlabs_apt_protocol as apt
+
+
+def test_acknowledges_per_port():
+    keepalive = apt.KeepAlive(interval=0.5, resolution=0.01)
+    for dest in range(0x50, 0x60):
+        keepalive.add("A", dest, now=0.0)
+    for dest in range(0x21, 0x24):
+        keepalive.add("B", dest, (0x0481, 0x0661), now=0.25)
+    assert len(keepalive) == 19
+    assert keepalive.due(0.1) == {}
+    out = keepalive.due(0.5)
+    assert list(out) == ["A"]
+    assert out["A"][:6] == apt.mot_ack_dcstatusupdate(0x50, 1)
+    assert len(out["A"]) == 16 * 6
+    assert keepalive.due(0.6) == {}
+    out = keepalive.due(0.76)
+    assert list(out) == ["B"]
+    # Both acknowledgements of each controller
+    assert out["B"][:12] == (
+        apt.mot_ack_dcstatusupdate(0x21, 1) + apt.pz_ack_pzstatusupdate(0x21, 1)
+    )
+    assert len(out["B"]) == 3 * 12
+
+
+def test_touch_and_remove():
+    keepalive = apt.KeepAlive(interval=0.5, resolution=0.01)
+    keepalive.add("A", 0x50, now=0.0)
+    keepalive.add("A", 0x51, now=0.0)
+    keepalive.add("A", 0x52, now=0.0)
+    keepalive.touch("A", 0x50, now=0.4)
+    keepalive.remove("A", 0x51)
+    assert keepalive.deadline("A", 0x51) is None
+    assert keepalive.due(0.5) == {"A": apt.mot_ack_dcstatusupdate(0x52, 1)}
+    assert keepalive.due(0.9) == {"A": apt.mot_ack_dcstatusupdate(0x50, 1)}
+
+
+def test_late_call():
+    keepalive = apt.KeepAlive(interval=0.5, resolution=0.01)
+    for dest in range(0x50, 0x54):
+        keepalive.add("A", dest, now=0.1 * dest - 8)
+    keepalive.due(0.0)
+    # Everything is due after a gap longer than a turn of the wheel
+    assert len(keepalive.due(100.0)["A"]) == 4 * 6
+    assert keepalive.due(100.1) == {}
+
+
+def test_update_from_message():
+    keepalive = apt.KeepAlive(interval=0.5, resolution=0.01)
+    body = bytes(14)
+    frame = struct.pack("<HHBB", 0x0491, len(body), 0x81, 0x50) + body
+    (msg,) = list(apt.Unpacker(io.BytesIO(frame)))
+    keepalive.update("p", msg, now=0)
+    assert keepalive.due(0.6) == {"p": apt.mot_ack_dcstatusupdate(0x50, 1)}
+    assert abs(keepalive.deadline("p", 0x50) - 1.1) < 1e-9
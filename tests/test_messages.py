@@ -0,0 +1,66 @@
+import io
+import pickle
+
+import thorlabs_apt_protocol as apt
+from thorlabs_apt_protocol.messages import MESSAGE_CLASSES, message_class
+
+from benchmarks.streams import FAMILIES
+
+
+def decode(data):
+    (msg,) = list(apt.Unpacker(io.BytesIO(data)))
+    return msg
+
+
+def test_layout():
+    msg = decode(FAMILIES["mot"][2])  # mot_get_velparams
+    assert type(msg) is MESSAGE_CLASSES[0x0415]
+    assert msg.msg == "mot_get_velparams" and msg.msgid == 0x0415
+    assert msg._fields[:3] == ("dest", "source", "chan_ident")
+    assert (msg[0], msg[1], msg[2]) == (0x01, 0x50, 1)
+    assert len(msg) == len(msg._fields)
+    assert repr(msg).startswith("mot_get_velparams(dest=1, source=80, chan_ident=1")
+
+
+def test_asdict():
+    msg = decode(FAMILIES["mot"][2])
+    fields = msg._asdict()
+    assert list(fields)[:4] == ["msg", "msgid", "dest", "source"]
+    assert fields["msg"] == "mot_get_velparams"
+    assert fields["msgid"] == 0x0415
+    assert fields["max_velocity"] == msg.max_velocity
+
+
+def test_equality():
+    velparams = decode(FAMILIES["mot"][2])
+    assert velparams == decode(FAMILIES["mot"][2])
+    assert not velparams != decode(FAMILIES["mot"][2])
+    assert velparams != velparams._replace(chan_ident=2)
+    # Same values, different message type
+    other = message_class(0x0464, velparams._fields)(*velparams)
+    assert velparams != other
+    assert velparams != tuple(velparams)
+    assert velparams != "mot_get_velparams"
+
+
+def test_hash():
+    velparams = decode(FAMILIES["mot"][2])
+    other = message_class(0x0464, velparams._fields)(*velparams)
+    assert hash(velparams) == hash(decode(FAMILIES["mot"][2]))
+    assert len({velparams, decode(FAMILIES["mot"][2]), other}) == 2
+
+
+def test_pickle():
+    for frames in FAMILIES.values():
+        for frame in frames:
+            msg = decode(frame)
+            copy = pickle.loads(pickle.dumps(msg))
+            assert type(copy) is type(msg)
+            assert copy == msg
+            assert copy._asdict() == msg._asdict()
+
+
+def test_class_is_cached():
+    fields = MESSAGE_CLASSES[0x0415]._fields
+    assert message_class(0x0415, fields) is MESSAGE_CLASSES[0x0415]
+    assert message_class(0x0415, fields + ("timestamp",)) is not MESSAGE_CLASSES[0x0415]
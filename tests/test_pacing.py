@@ -0,0 +1,21 @@
+import pytest
+
+from thorlabs_apt_protocol.pacing import LinkPacer
+
+
+def test_paced():
+    link = LinkPacer(115200)
+    assert link.bytes_per_second == 11520
+    assert link.send(1152, now=0) == pytest.approx(0.1)
+    # Bytes written while the link is busy are sent after the others
+    assert link.send(1152, now=0.05) == pytest.approx(0.2)
+    assert not link.ready(0.15)
+    assert link.ready(0.15, lookahead=0.05)
+    # An idle link starts sending at once
+    assert link.send(1152, now=1) == pytest.approx(1.1)
+
+
+def test_unpaced():
+    link = LinkPacer(None)
+    assert link.send(1000, now=2) == 2
+    assert link.ready(0)
@@ -0,0 +1,48 @@
+import struct
+
+import pytest
+
+from thorlabs_apt_protocol import parsing
+from thorlabs_apt_protocol.parsing import STATUS_BITS, STATUS_MESSAGES, id_to_func
+
+
+def test_mot_dig_ins():
+    for i in range(4):
+        bits = parsing._parse_status_bits(0x100000 << i)
+        assert bits["dig_ins"] == [j == i for j in range(4)]
+        assert STATUS_BITS["mot"][f"dig_in{i + 1}"] == 0x100000 << i
+
+
+@pytest.mark.parametrize(
+    "parse_bits, name, values",
+    [
+        (parsing._parse_la_status_bits, "units", ["mA", "mW", "dBm"]),
+        (parsing._parse_ld_status_bits, "tia_range", ["9uA", "100uA", "0.9mA", "10mA"]),
+        (
+            parsing._parse_tec_status_bits,
+            "display_mode",
+            ["temp_actual", "temp_set", "temp_delta", "current"],
+        ),
+    ],
+)
+def test_string_fields(parse_bits, name, values):
+    assert parse_bits(0)[name] == ""
+    for i, value in enumerate(values):
+        assert parse_bits(0x10 << i)[name] == value
+
+
+@pytest.mark.parametrize("msgid", sorted(STATUS_MESSAGES))
+def test_status_bits_match_parser(msgid):
+    # Every named bit sets exactly the field of the same name in the decoded message
+    layout, offset, _ = STATUS_MESSAGES[msgid]
+    length = offset + 4 - parsing.HEADER_SIZE
+    for name, mask in STATUS_BITS[layout].items():
+        data = bytearray(
+            struct.pack("<HHBB", msgid, length, 0x81, 0x50) + bytes(length)
+        )
+        data[offset : offset + 4] = struct.pack("<L", mask)
+        clear = id_to_func[msgid](bytes(length and data[:offset] + bytes(4)))
+        fields = id_to_func[msgid](bytes(data))
+        changed = [k for k in fields if fields[k] != clear[k]]
+        assert len(changed) == 1, (name, changed)
+        assert name.startswith(changed[0].rstrip("s")), (name, changed)
@@ -0,0 +1,77 @@
+import collections
+
+import pytest
+
+import thorlabs_apt_protocol as apt
+from thorlabs_apt_protocol.emulator import BAYS, RACK, EmulatedController
+from thorlabs_apt_protocol.pipeline import AXIS_PARAMETERS, read_parameters
+
+
+class Port:
+    """File-like port connected to an emulated controller."""
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.buffer = b""
+
+    def write(self, data):
+        self.controller.receive_data(data)
+
+    def read(self, size):
+        if not self.buffer:
+            self.buffer = self.controller.data_to_send()
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+class CountingCorrelator(apt.Correlator):
+    """Correlator recording the most requests in flight to each controller."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.in_flight = collections.Counter()
+        self.most = collections.Counter()
+
+    def request(self, func, dest, **kwargs):
+        future = super().request(func, dest, **kwargs)
+        self.in_flight[dest] += 1
+        self.most[dest] = max(self.most[dest], self.in_flight[dest])
+        future.add_done_callback(lambda _: self.in_flight.subtract([dest]))
+        return future
+
+
+def test_read_parameters():
+    port = Port(EmulatedController(address=RACK, bays=BAYS[:3]))
+    correlator = CountingCorrelator(port.write)
+    axes = [(bay, 1) for bay in BAYS[:3]]
+    results = read_parameters(correlator, apt.Unpacker(port), axes, window=4)
+    assert list(results) == axes
+    for (dest, chan_ident), messages in results.items():
+        assert len(messages) == len(AXIS_PARAMETERS)
+        assert "mot_get_velparams" in messages
+        for msg in messages.values():
+            assert (msg.source, msg.chan_ident) == (dest, chan_ident)
+    assert correlator.most == {bay: 4 for bay in BAYS[:3]}
+    assert not correlator._pending
+
+
+def test_read_parameters_one_at_a_time():
+    port = Port(EmulatedController(channels=2))
+    correlator = CountingCorrelator(port.write)
+    axes = [(0x50, 1), (0x50, 2)]
+    requests = AXIS_PARAMETERS[:3]
+    results = read_parameters(
+        correlator, apt.Unpacker(port), axes, requests=requests, window=1
+    )
+    assert [len(messages) for messages in results.values()] == [3, 3]
+    assert results[(0x50, 2)]["mot_get_jogparams"].chan_ident == 2
+    assert correlator.most == {0x50: 1}
+
+
+def test_no_response():
+    # No controller in the last bay
+    port = Port(EmulatedController(address=RACK, bays=BAYS[:2]))
+    correlator = apt.Correlator(port.write, timeout=0.01)
+    axes = [(BAYS[0], 1), (BAYS[2], 1)]
+    with pytest.raises(TimeoutError):
+        read_parameters(correlator, apt.Unpacker(port), axes, window=4)
@@ -0,0 +1,80 @@
+import io
+import struct
+
+import pytest
+
+import thorlabs_apt_protocol as apt
+from thorlabs_apt_protocol.emulator import EmulatedController
+from thorlabs_apt_protocol.polling import _response_length
+
+
+def test_response_length():
+    assert _response_length(0x0491, 1) == 20  # mot_get_dcstatusupdate
+    assert _response_length(0x0870, 3) == 18  # quad_get_params
+    assert _response_length(0x0842, 3) == 14  # tec_get_params
+
+
+def test_paced_schedule():
+    scheduler = apt.PollScheduler()
+    request = apt.mot_req_dcstatusupdate(0x50, 1, 1)
+    scheduler.add(request, 10, now=0)
+    assert scheduler.due(0) == request
+    assert scheduler.due(0.05) == b""
+    # A late call sends one poll, and does not send another until a period later
+    assert scheduler.due(0.35) == request
+    assert scheduler.due(0.36) == b""
+    assert scheduler.due(0.44) == b""
+    assert scheduler.due(0.45) == request
+    assert scheduler.next_due() == pytest.approx(0.55)
+
+
+def test_fair_allocation():
+    scheduler = apt.PollScheduler(baudrate=115200, utilization=0.9)
+    for dest in range(0x20, 0x34):
+        scheduler.add(apt.mot_req_dcstatusupdate(dest, 1, 1), 200, now=0)
+    scheduler.add(apt.tec_req_readings(0x61, 1), 2, now=0)
+    rates = scheduler.rates(now=1)
+    # The small request is met, the others share the rest of the link equally
+    assert rates[-1].allocated == 2
+    assert [r.allocated for r in rates[:-1]] == pytest.approx([rates[0].allocated] * 20)
+    readings = _response_length(0x0842, 3)  # tec_get_params
+    capacity = sum(r.allocated * 20 for r in rates[:-1]) + 2 * readings
+    assert capacity == pytest.approx(11520 * 0.9)
+    with pytest.raises(ValueError):
+        scheduler.add(apt.mot_move_stop(0x50, 1, 1, 2), 1)
+    scheduler.remove(apt.tec_req_readings(0x61, 1))
+    assert len(scheduler) == 20
+
+
+def test_counts_responses():
+    controller = EmulatedController(channels=2)
+    scheduler = apt.PollScheduler()
+    scheduler.add(apt.mot_req_dcstatusupdate(0x50, 1, 1), 50, now=0)
+    scheduler.add(apt.mot_req_statusupdate(0x50, 1, 2), 20, now=0)
+    for k in range(400):
+        now = k * 0.005
+        controller.receive_data(scheduler.due(now))
+        controller.tick(now)
+        for msg in apt.Unpacker(io.BytesIO(controller.data_to_send())):
+            scheduler.update(msg)
+    for rate in scheduler.rates(now=2):
+        assert rate.sent == pytest.approx(rate.requested, rel=0.05)
+        assert rate.received == pytest.approx(rate.sent, rel=0.05)
+
+
+def test_counts_responses_without_channel():
+    scheduler = apt.PollScheduler()
+    one = apt.mot_req_adcinputs(0x50, 1, 1)
+    two = apt.mot_req_adcinputs(0x50, 1, 2)
+    scheduler.add(one, 10, now=0)
+    scheduler.add(two, 10, now=0)
+    assert scheduler.due(0) == one + two
+    body = struct.pack("<HH", 0, 0)
+    data = struct.pack("<HHBB", 0x042C, len(body), 0x81, 0x50) + body
+    for msg in apt.Unpacker(io.BytesIO(data * 3)):
+        scheduler.update(msg)
+    # One response each, and a third for the poll sent first
+    assert [r.received for r in scheduler.rates(now=1)] == [2, 1]
+    scheduler.remove(one)
+    scheduler.remove(two)
+    assert scheduler._by_response == {}
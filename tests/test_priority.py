@@ -0,0 +1,57 @@
+import pytest
+
+import thorlabs_apt_protocol as apt
+
+
+def test_lanes():
+    queue = apt.CommandQueue(baudrate=None)
+    queue.put(apt.mot_set_velparams(0x50, 1, 1, 0, 10, 20), now=0)
+    queue.put(apt.mot_move_absolute(0x50, 1, 1, 100), now=0)
+    queue.put(apt.mot_move_stop(0x50, 1, 1, 2), now=0)
+    queue.put(apt.hw_req_info(0x50, 1), lane=apt.SAFETY, now=0)
+    assert [s.queued for s in queue.stats()] == [2, 1, 1]
+    # Unpaced: everything is released at once, highest lane first
+    assert queue.due(now=0) == (
+        apt.mot_move_stop(0x50, 1, 1, 2)
+        + apt.hw_req_info(0x50, 1)
+        + apt.mot_move_absolute(0x50, 1, 1, 100)
+        + apt.mot_set_velparams(0x50, 1, 1, 0, 10, 20)
+    )
+    assert len(queue) == 0
+    assert queue.next_due() is None
+
+
+def test_stop_preempts_bulk():
+    queue = apt.CommandQueue(baudrate=115200, lookahead=0.005)
+    upload = apt.mot_set_velparams(0x50, 1, 1, 0, 10, 20)
+    for _ in range(1000):
+        queue.put(upload, now=0)
+    sent = queue.due(now=0)
+    assert 0 < len(sent) < 1000 * len(upload)
+    stop = apt.mot_move_stop(0x50, 1, 1, 2)
+    queue.put(stop, now=0.001)
+    now = 0.001
+    while True:
+        data = queue.due(now=now)
+        if data:
+            assert data.startswith(stop)
+            break
+        now = queue.next_due()
+    safety, _, bulk = queue.stats()
+    assert safety.sent == 1
+    # At most the lookahead, the longest message released and the stop itself
+    assert safety.max <= 0.005 + (len(upload) + len(stop)) / 11520
+    assert bulk.queued > 0
+    queue.reset()
+    assert [s.sent for s in queue.stats()] == [0, 0, 0]
+
+
+def test_pacing():
+    queue = apt.CommandQueue(baudrate=115200, lookahead=0)
+    message = apt.hw_req_info(0x50, 1)
+    for _ in range(3):
+        queue.put(message, now=0)
+    assert queue.due(now=0) == message
+    assert queue.due(now=0) == b""
+    assert queue.next_due() == pytest.approx(6 / 11520)
+    assert queue.due(now=queue.next_due()) == message
@@ -0,0 +1,42 @@
+import io
+
+import pytest
+
+import thorlabs_apt_protocol as apt
+from thorlabs_apt_protocol import fastpath, parsing, profiling
+
+from benchmarks.streams import clean_stream
+
+
+def decode_stream():
+    unpacker = apt.Unpacker(io.BytesIO(clean_stream(500)))
+    list(unpacker)
+    return unpacker.metrics()["frames_decoded"]
+
+
+def test_profiling():
+    registries = (parsing.id_to_func, fastpath.decoders, fastpath.stamped_decoders)
+    originals = [dict(registry) for registry in registries]
+    profiling.reset()
+    profiling.enable()
+    try:
+        assert profiling.is_enabled()
+        assert parsing.id_to_func[0x0491] is not originals[0][0x0491]
+        decoded = decode_stream()
+    finally:
+        profiling.disable()
+    assert not profiling.is_enabled()
+    assert [dict(registry) for registry in registries] == originals
+    stats = profiling.stats()
+    assert {msgid: s["count"] for msgid, s in stats.items()} == decoded
+    velparams = stats[0x0415]
+    assert velparams["msg"] == "mot_get_velparams"
+    assert 0 < velparams["p50_ns"] <= velparams["p99_ns"]
+    assert velparams["mean_ns"] == pytest.approx(
+        velparams["total_ns"] / velparams["count"]
+    )
+    # Nothing is timed while disabled
+    decode_stream()
+    assert profiling.stats() == stats
+    profiling.reset()
+    assert profiling.stats() == {}
@@ -0,0 +1,67 @@
+import io
+import struct
+
+import pytest
+
+import thorlabs_apt_protocol as apt
+
+
+def tec_status(temp):
+    body = struct.pack("<hhHL", 250, temp, 2500, 0x1)
+    return struct.pack("<HHBB", 0x0861, len(body), 0x81, 0x50) + body
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def stamped(frames, clock):
+    out = []
+    for frame in frames:
+        out.extend(apt.Unpacker(io.BytesIO(frame), clock=clock))
+        clock.now += 0.125
+    return out
+
+
+def test_cache_uses_clock():
+    clock = Clock()
+    cache = apt.DeviceStateCache(clock=lambda: 5.0)
+    (msg,) = stamped([tec_status(2500)], clock)
+    state = cache.update(msg)
+    assert state.timestamp == 5.0
+    assert state.age(6.0) == 1.0
+    assert "timestamp" not in state.values
+
+
+def test_cache_uses_message_timestamps():
+    clock = Clock()
+    cache = apt.DeviceStateCache(clock=None)
+    for msg in stamped([tec_status(2500), tec_status(2600)], clock):
+        state = cache.update(msg)
+    assert state.timestamp == 0.125
+    assert state["temp_actual"] == 2600
+    assert state.generation == 2
+    unstamped = next(apt.Unpacker(io.BytesIO(tec_status(2500))))
+    with pytest.raises(ValueError):
+        cache.update(unstamped)
+
+
+def test_aggregator_windows_in_seconds():
+    clock = Clock()
+    aggregator = apt.Aggregator(window=1.0, clock=None)
+    messages = stamped([tec_status(2500 + i) for i in range(25)], clock)
+    summaries = [s for s in map(aggregator.update, messages) if s is not None]
+    assert [s.count for s in summaries] == [8, 8, 8]
+    assert summaries[0].fields["temp_actual"].mean == pytest.approx(2503.5)
+
+
+def test_aggregator_every():
+    aggregator = apt.Aggregator(every=3)
+    messages = [next(apt.Unpacker(io.BytesIO(tec_status(t)))) for t in (1, 2, 3)]
+    summaries = [aggregator.update(msg) for msg in messages]
+    assert summaries[:2] == [None, None]
+    assert summaries[2].fields["temp_actual"].max == 3
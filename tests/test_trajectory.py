@@ -0,0 +1,98 @@
+import struct
+
+import pytest
+
+import thorlabs_apt_protocol as apt
+from thorlabs_apt_protocol.emulator import EmulatedController
+from thorlabs_apt_protocol.trajectory import TrajectoryUploader
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def points(n):
+    return ((i * 10, i * 100, -i * 100) for i in range(n))
+
+
+def uploader(controller, written, fake, **kwargs):
+    def write(data):
+        written.append(data)
+        controller.receive_data(data)
+
+    return TrajectoryUploader(
+        write, 0x50, channels=0b11, clock=fake.clock, sleep=fake.sleep, **kwargs
+    )
+
+
+def test_upload_to_emulator():
+    controller = EmulatedController(channels=2)
+    written, fake, reports = [], FakeTime(), []
+    upload = uploader(controller, written, fake, on_progress=reports.append)
+    report = upload.upload(points(1000))
+    # 20 points of 3 values fit in 255 bytes of data
+    assert upload.points_per_frame == 20
+    headers = [struct.unpack_from("<4H", frame, 6) for frame in written]
+    assert [h[2] for h in headers] == [20] * 50
+    assert [h[3] for h in headers] == list(range(0, 1000, 20))
+    assert max(len(frame) for frame in written) <= 6 + apt.unpacker.MAX_DATA_LENGTH
+    assert controller.trajectories[(0x50, 0)] == list(points(1000))
+    assert (report.points, report.frames) == (1000, 50)
+    assert report.bytes == sum(len(frame) for frame in written)
+    assert len(reports) == 50 and reports[-1] == report
+
+
+def test_start_ix():
+    controller = EmulatedController(channels=2)
+    written = []
+    upload = uploader(controller, written, FakeTime(), max_points=100)
+    upload.upload(points(40))
+    # Overwrite from the middle of the array
+    upload.upload(points(30), start_ix=30)
+    assert [struct.unpack_from("<4H", frame, 6)[3] for frame in written[2:]] == [30, 50]
+    assert controller.trajectories[(0x50, 0)] == list(points(30)) * 2
+    with pytest.raises(ValueError):
+        upload.upload(points(30), start_ix=80)
+
+
+def test_paced_to_link():
+    controller = EmulatedController(channels=2)
+    written, fake, reports = [], FakeTime(), []
+    upload = uploader(controller, written, fake, on_progress=reports.append)
+    report = upload.upload(points(100))
+    # Each message is written once the previous one has been sent
+    assert fake.sleeps == pytest.approx([len(frame) / 11520 for frame in written])
+    sent = 0
+    for frame, progress in zip(written, reports):
+        sent += len(frame)
+        assert progress.seconds == pytest.approx(sent / 11520)
+    assert report.points_per_second == pytest.approx(100 / report.seconds)
+    # Unpaced
+    fake = FakeTime()
+    uploader(controller, [], fake, baudrate=None).upload(points(100))
+    assert fake.sleeps == []
+
+
+def test_max_points():
+    controller = EmulatedController(channels=2)
+    upload = uploader(controller, [], FakeTime(), max_points=50)
+    with pytest.raises(ValueError, match="50 points"):
+        upload.upload(points(100))
+    # Points fitting in the controller are sent
+    assert len(controller.trajectories[(0x50, 0)]) == 40
+    upload.upload(points(50))
+
+
+def test_point_length():
+    upload = uploader(EmulatedController(channels=2), [], FakeTime())
+    with pytest.raises(ValueError, match="Point 2 has 2 values, expected 3"):
+        upload.upload([(0, 1, 2), (1, 2, 3), (2, 3)])
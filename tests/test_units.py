@@ -0,0 +1,98 @@
+import io
+import struct
+from collections import namedtuple
+
+import pytest
+
+import thorlabs_apt_protocol as apt
+from thorlabs_apt_protocol.units import UnitConverter, controller_type
+
+from benchmarks.streams import LONG_FRAME, frame
+
+Info = namedtuple("Info", ["model_number"])
+StageAxisParams = namedtuple("StageAxisParams", ["counts_per_unit"])
+
+
+@pytest.mark.parametrize(
+    "counts_per_unit, controller, velocity, acceleration",
+    [
+        (34554.96, "dc", 772981.37, 263.84),  # Z8 on KDC101
+        (34304, "dc", 767367.49, 261.93),  # Z8 on TDC001
+        (20000, "brushless", 134217.73, 13.744),  # DDS stages on BBD
+        (409600, "stepper", 21987328, 4506),  # LTS
+    ],
+)
+def test_documented_scales(counts_per_unit, controller, velocity, acceleration):
+    converter = UnitConverter(counts_per_unit, controller)
+    assert converter.scales["position"] == counts_per_unit
+    assert converter.scales["velocity"] == pytest.approx(velocity, rel=1e-5)
+    assert converter.scales["acceleration"] == pytest.approx(acceleration, rel=1e-3)
+
+
+def test_controller_type():
+    assert controller_type(b"KDC101\x00\x00") == "dc"
+    assert controller_type("LTS300") == "stepper"
+    with pytest.raises(KeyError):
+        controller_type("XYZ")
+
+
+def test_from_messages():
+    (info,) = apt.Unpacker(io.BytesIO(LONG_FRAME))
+    converter = UnitConverter.from_messages(info, StageAxisParams(34554.96))
+    assert converter.controller == "dc"
+    assert converter.counts_per_unit == 34554.96
+    converter = UnitConverter.from_messages(Info(b"BBD20\x00"), counts_per_unit=2000)
+    assert converter.scales["position"] == 2000
+    assert converter.controller == "brushless"
+    with pytest.raises(ValueError):
+        UnitConverter.from_messages(info)
+
+
+def test_scalars():
+    converter = UnitConverter(34554.96, "dc")
+    assert converter.to_device(1.0) == 34555
+    assert isinstance(converter.to_device(1), int)
+    assert converter.to_device(2.0, "velocity") == 1545963
+    assert converter.to_physical(34554.96) == pytest.approx(1.0)
+    assert converter.to_physical(263.84430775926785, "acceleration") == pytest.approx(1)
+
+
+def test_arrays():
+    np = pytest.importorskip("numpy")
+    converter = UnitConverter(34554.96, "dc")
+    device = converter.to_device([0.0, 1.0, -2.5])
+    assert device.dtype == np.int64
+    assert device.tolist() == [0, 34555, -86387]
+    physical = converter.to_physical(np.array([0, 772981]), "velocity")
+    assert physical.dtype == float
+    assert physical == pytest.approx([0.0, 1.0], abs=1e-6)
+
+
+def test_message_to_physical():
+    converter = UnitConverter(34554.96, "dc")
+    acceleration = round(converter.scales["acceleration"] * 3)
+    velocity = round(converter.scales["velocity"] * 5)
+    data = frame(0x0415, struct.pack("<H3l", 1, 0, acceleration, velocity))
+    (velparams,) = apt.Unpacker(io.BytesIO(data))
+    fields = converter.message_to_physical(velparams)
+    assert fields["msg"] == "mot_get_velparams"
+    assert fields["chan_ident"] == 1
+    assert fields["acceleration"] == pytest.approx(3, rel=1e-3)
+    assert fields["max_velocity"] == pytest.approx(5, rel=1e-6)
+
+
+def test_table_to_physical():
+    pytest.importorskip("numpy")
+    converter = UnitConverter(2000, "dc")
+    table = {
+        "msg": ["mot_get_dcstatusupdate"] * 3,
+        "position": [0, 2000, None],
+        "velocity": [1, 2, 3],
+    }
+    out = converter.table_to_physical(table)
+    assert out["position"][:2].tolist() == [0.0, 1.0]
+    assert out["position"][2] != out["position"][2]  # NaN
+    # Status update velocities are not scaled
+    assert out["velocity"] == [1, 2, 3]
+    assert table["position"] == [0, 2000, None]
+    assert converter.table_to_physical({"msg": []}) == {"msg": []}
@@ -0,0 +1,97 @@
+import io
+import struct
+
+import thorlabs_apt_protocol as apt
+
+from benchmarks.streams import (
+    FAMILIES,
+    LONG_FRAME,
+    SHORT_FRAME,
+    FragmentedReader,
+    clean_stream,
+    noisy_stream,
+)
+
+
+def test_every_family_decodes():
+    for frames in FAMILIES.values():
+        for frame in frames:
+            (msg,) = list(apt.Unpacker(io.BytesIO(frame)))
+            assert msg.msgid == frame[0] | frame[1] << 8
+            assert msg.source == 0x50
+
+
+def test_fragmented_reads():
+    data = clean_stream(200)
+    whole = list(apt.Unpacker(io.BytesIO(data)))
+    unpacker = apt.Unpacker(FragmentedReader(data, chunk=3))
+    fragmented = []
+    # A short read ends iteration, as a serial port timeout would
+    for _ in range(len(data)):
+        fragmented.extend(unpacker)
+    assert len(whole) == 200
+    assert fragmented == whole
+
+
+def test_noise_is_skipped():
+    messages = list(apt.Unpacker(io.BytesIO(noisy_stream(200)), on_error="continue"))
+    assert len(messages) >= 200
+
+
+def test_raw_frames_decode_like_messages():
+    data = SHORT_FRAME + LONG_FRAME
+    raw = list(apt.Unpacker(io.BytesIO(data), raw=True))
+    assert [bytes(f.data) for f in raw] == [SHORT_FRAME, LONG_FRAME]
+    assert [apt.decode(f) for f in raw] == list(apt.Unpacker(io.BytesIO(data)))
+
+
+def test_metrics_of_errors():
+    bad_address = struct.pack("<HHBB", 0x0415, 14, 0x81, 0x70)
+    oversize = struct.pack("<HHBB", 0x0415, 300, 0x81, 0x50)
+    data = (
+        b"\xff\xff" + SHORT_FRAME + bad_address + SHORT_FRAME + oversize + SHORT_FRAME
+    )
+    unpacker = apt.Unpacker(io.BytesIO(data), on_error="ignore")
+    assert len(list(unpacker)) == 3
+    metrics = unpacker.metrics()
+    assert metrics["bytes_read"] == len(data)
+    assert metrics["frames_decoded"] == {0x0212: 3}
+    assert metrics["bad_address"] == 1
+    assert metrics["oversize_length"] == 1
+    # Each error discards one byte, and the rest of the bad headers are not messages
+    assert metrics["invalid_msgid"] == 2 + 5 + 5
+    assert metrics["bytes_discarded"] == 2 + 6 + 6
+    assert metrics["short_reads"] == 1
+
+
+def test_metrics_of_noisy_stream():
+    data = noisy_stream(500)
+    unpacker = apt.Unpacker(io.BytesIO(data), on_error="ignore")
+    messages = list(unpacker)
+    metrics = unpacker.metrics()
+    assert metrics["bytes_read"] == len(data)
+    assert sum(metrics["frames_decoded"].values()) == len(messages) == 500
+    decoded = len(b"".join(clean_stream(1, seed=i) for i in range(500)))
+    assert metrics["bytes_discarded"] == len(data) - decoded > 0
+    assert metrics["bytes_discarded"] == (
+        metrics["invalid_msgid"] + metrics["bad_address"] + metrics["oversize_length"]
+    )
+    # Only the end of the stream is a short read
+    assert metrics["short_reads"] == 1
+
+
+def test_metrics_of_fragmented_stream():
+    data = clean_stream(100)
+    unpacker = apt.Unpacker(FragmentedReader(data, chunk=4))
+    messages = []
+    for _ in range(len(data)):
+        messages.extend(unpacker)
+    metrics = unpacker.metrics()
+    assert metrics["bytes_read"] == len(data)
+    assert metrics["bytes_discarded"] == 0
+    assert sum(metrics["frames_decoded"].values()) == len(messages) == 100
+    assert metrics["invalid_msgid"] == 0
+    assert metrics["bad_address"] == 0
+    assert metrics["oversize_length"] == 0
+    # Every message takes more than one read of at most 4 bytes
+    assert metrics["short_reads"] >= 100
@@ -0,0 +1,36 @@
+import pytest
+
+import thorlabs_apt_protocol as apt
+
+np = pytest.importorskip("numpy")
+from thorlabs_apt_protocol import vectorized  # noqa: E402
+
+
+def test_matches_functions():
+    rng = np.random.default_rng(0)
+    dests = rng.integers(0x21, 0x2B, 50)
+    chans = rng.integers(1, 3, 50)
+    positions = rng.integers(-(2**31), 2**31, 50)
+    expected = b"".join(
+        apt.mot_move_absolute(int(d), 1, int(c), int(p))
+        for d, c, p in zip(dests, chans, positions)
+    )
+    assert vectorized.mot_move_absolute(dests, 1, chans, positions) == expected
+
+
+def test_broadcast():
+    data = vectorized.pz_set_outputvolts([0x21, 0x22], 1, 1, 100)
+    assert data == apt.pz_set_outputvolts(0x21, 1, 1, 100) + apt.pz_set_outputvolts(
+        0x22, 1, 1, 100
+    )
+
+
+def test_empty():
+    assert vectorized.mot_move_absolute([], 1, 1, []) == b""
+
+
+def test_checks():
+    with pytest.raises(TypeError):
+        vectorized.mot_move_relative(0x50, 1, 1, [1.5])
+    with pytest.raises(ValueError):
+        vectorized.pz_set_outputvolts(0x50, 1, 1, [2**15])
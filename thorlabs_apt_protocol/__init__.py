@@ -3,3 +3,13 @@
 __version__ = "29.0.0"
 from .functions import *
 from .unpacker import *
+from .correlation import *
+from .state import *
+from .filters import *
+from .edges import *
+from .aggregate import *
+from .keepalive import *
+from .connection import *
+from .polling import *
+from .coalesce import *
+from .priority import *
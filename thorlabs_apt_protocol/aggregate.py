@@ -0,0 +1,189 @@
+__all__ = ["TELEMETRY_IDS", "FieldStats", "Aggregate", "Aggregator"]
+
+from collections import namedtuple
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+TELEMETRY_IDS = frozenset(
+    (
+        0x063A,  # pz_get_nttiareading
+        0x0821,  # la_get_statusupdate
+        0x0861,  # tec_get_statusupdate
+        0x0881,  # quad_get_statusupdate
+    )
+)
+"""Message ids of high rate telemetry, the default for ``Aggregator``."""
+
+FieldStats = namedtuple("FieldStats", ["min", "max", "mean", "last"])
+FieldStats.__doc__ = "Summary of one field over a window."
+
+Aggregate = namedtuple(
+    "Aggregate", ["msg", "source", "chan_ident", "start", "end", "count", "fields"]
+)
+Aggregate.__doc__ = "Summary of the messages from one channel over a window."
+
+_HEADER_FIELDS = frozenset(
+    ("msg", "msgid", "dest", "source", "chan_ident", "timestamp")
+)
+
+
+class _Window:
+    __slots__ = (
+        "msg",
+        "start",
+        "end",
+        "count",
+        "names",
+        "mins",
+        "maxs",
+        "sums",
+        "lasts",
+    )
+
+    def __init__(self, msg, fields, timestamp):
+        self.msg = msg.msg
+        self.start = self.end = timestamp
+        self.count = 1
+        self.names = [
+            name
+            for name, value in fields.items()
+            if name not in _HEADER_FIELDS and isinstance(value, (int, float))
+        ]
+        values = [fields[name] for name in self.names]
+        self.mins = list(values)
+        self.maxs = list(values)
+        self.sums = list(values)
+        self.lasts = values
+
+    def add(self, fields, timestamp):
+        self.end = timestamp
+        self.count += 1
+        mins, maxs, sums = self.mins, self.maxs, self.sums
+        values = [fields[name] for name in self.names]
+        for i, value in enumerate(values):
+            if value < mins[i]:
+                mins[i] = value
+            elif value > maxs[i]:
+                maxs[i] = value
+            sums[i] += value
+        self.lasts = values
+
+    def summary(self, source, chan_ident) -> Aggregate:
+        fields = {
+            name: FieldStats(
+                self.mins[i], self.maxs[i], self.sums[i] / self.count, self.lasts[i]
+            )
+            for i, name in enumerate(self.names)
+        }
+        return Aggregate(
+            self.msg, source, chan_ident, self.start, self.end, self.count, fields
+        )
+
+
+def _time(msg, clock: Optional[Callable[[], float]]) -> float:
+    # Time of a message, from one source only: the clock or the receive timestamps
+    if clock is not None:
+        return clock()
+    timestamp = getattr(msg, "timestamp", None)
+    if timestamp is None:
+        raise ValueError(
+            f"{msg.msg} has no receive timestamp, give the Unpacker a clock"
+        )
+    return timestamp
+
+
+class Aggregator:
+    """
+    Summarise high rate messages over fixed windows.
+
+    For each message type and channel, the minimum, maximum, mean and last value of every
+    numeric field (including the status flags) is accumulated, and an ``Aggregate`` is
+    emitted when the window closes.
+    Windows close either after ``window`` seconds, or after ``every`` messages.
+    Memory use is constant per channel, messages are not stored.
+
+    Messages are timed by ``clock``, or, if ``clock`` is None, by their receive
+    ``timestamp`` (see the ``clock`` of ``Unpacker``), in seconds.
+
+    :param window: Length of each window, in seconds.
+    :param every: Number of messages in each window.
+    :param msgids: Message ids to aggregate, defaults to ``TELEMETRY_IDS``.
+        Other messages are ignored.
+    :param clock: Callable returning the current time in seconds, or None to use the
+        receive ``timestamp`` of each message.
+    """
+
+    def __init__(
+        self,
+        window: Optional[float] = None,
+        every: Optional[int] = None,
+        msgids: Optional[Iterable[int]] = TELEMETRY_IDS,
+        clock: Optional[Callable[[], float]] = time.monotonic,
+    ):
+        if (window is None) == (every is None):
+            raise ValueError("Exactly one of window and every must be given")
+        self.window = window
+        self.every = every
+        self.msgids = None if msgids is None else frozenset(msgids)
+        self.clock = clock
+        self._windows: Dict[tuple, _Window] = {}
+
+    def update(self, msg, timestamp: Optional[float] = None) -> Optional[Aggregate]:
+        """
+        Add a decoded message to its window.
+
+        :param msg: A decoded message.
+        :param timestamp: Time of the message, defaults to the current time of ``clock``
+            (or the receive ``timestamp`` of the message, without a ``clock``).
+        :returns: The summary of the previous window, if this message closed it.
+        """
+        if self.msgids is not None and msg.msgid not in self.msgids:
+            return None
+        fields = msg._asdict()
+        if timestamp is None:
+            timestamp = _time(msg, self.clock)
+        chan_ident = fields.get("chan_ident")
+        key = (msg.msgid, msg.source, chan_ident)
+        current = self._windows.get(key)
+        if current is None:
+            self._windows[key] = _Window(msg, fields, timestamp)
+            return self._check_count(key)
+        if self.window is not None and timestamp >= current.start + self.window:
+            self._windows[key] = _Window(msg, fields, timestamp)
+            return current.summary(msg.source, chan_ident)
+        current.add(fields, timestamp)
+        return self._check_count(key)
+
+    def _check_count(self, key) -> Optional[Aggregate]:
+        current = self._windows[key]
+        if self.every is not None and current.count >= self.every:
+            del self._windows[key]
+            return current.summary(key[1], key[2])
+        return None
+
+    def consume(self, unpacker):
+        """
+        Aggregate every message from ``unpacker``, yielding each summary as it closes.
+
+        :param unpacker: ``Unpacker`` (or any iterable of decoded messages).
+        """
+        for msg in unpacker:
+            summary = self.update(msg)
+            if summary is not None:
+                yield summary
+
+    def flush(self, now: Optional[float] = None) -> List[Aggregate]:
+        """
+        Close windows which have expired without a new message, or all windows.
+
+        :param now: Current time; if None, all open windows are closed.
+        :returns: Summaries of the closed windows.
+        """
+        out = []
+        for key, current in list(self._windows.items()):
+            if now is None or (
+                self.window is not None and now >= current.start + self.window
+            ):
+                del self._windows[key]
+                out.append(current.summary(key[1], key[2]))
+        return out
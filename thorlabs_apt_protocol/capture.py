@@ -0,0 +1,210 @@
+"""
+Decoding of recorded byte streams (captures) in parallel.
+
+A capture is a file of the raw bytes received from one or more controllers, as written
+by e.g. ``open(path, "wb").write(port.read(...))``.
+"""
+
+__all__ = ["FrameIndex", "build_index", "decode_capture", "decode_capture_parallel"]
+
+import array
+from collections import namedtuple
+import concurrent.futures
+import mmap
+import os
+import struct
+from typing import Any, Dict, List, Optional
+import warnings
+
+from .parsing import HEADER_SIZE, id_to_func
+from .unpacker import MAX_DATA_LENGTH, VALID_DESTS, VALID_SOURCES, _decode
+
+Table = Dict[str, List[Any]]
+
+_HEADER = struct.Struct("<HHBB")
+
+
+FrameIndex = namedtuple("FrameIndex", ["offsets", "msgids", "discarded"])
+FrameIndex.__doc__ = """
+Position and message id of every valid message in a buffer.
+
+``offsets`` is an ``array('Q')`` and ``msgids`` an ``array('H')`` of the same length (use
+``numpy.frombuffer`` for numpy arrays without copying); ``discarded`` counts the invalid
+bytes skipped.
+"""
+
+
+def build_index(buf) -> FrameIndex:
+    """
+    Find every valid message in a buffer, without decoding any.
+
+    Messages are validated by the same rules as the ``Unpacker`` (known message id,
+    destination the host, known source, long form data no longer than
+    ``MAX_DATA_LENGTH``), and invalid bytes are skipped one at a time as it does, so the
+    messages found are exactly those an ``Unpacker`` would decode.
+    An incomplete message at the end of the buffer is not included.
+
+    :param buf: Bytes-like object (such as an ``mmap``) holding the data.
+    """
+    offsets = array.array("Q")
+    msgids = array.array("H")
+    add_offset = offsets.append
+    add_msgid = msgids.append
+    unpack_from = _HEADER.unpack_from
+    size = len(buf)
+    pos = 0
+    discarded = 0
+    while pos + HEADER_SIZE <= size:
+        msgid, length, dest, source = unpack_from(buf, pos)
+        if (
+            msgid in id_to_func
+            and dest & 0x7F in VALID_DESTS
+            and source in VALID_SOURCES
+            and (not dest & 0x80 or length <= MAX_DATA_LENGTH)
+        ):
+            end = pos + HEADER_SIZE + (length if dest & 0x80 else 0)
+            if end > size:
+                break
+            add_offset(pos)
+            add_msgid(msgid)
+            pos = end
+        else:
+            pos += 1
+            discarded += 1
+    return FrameIndex(offsets, msgids, discarded)
+
+
+def _frame_end(buf, offset: int) -> int:
+    _, length, dest, _ = _HEADER.unpack_from(buf, offset)
+    return offset + HEADER_SIZE + (length if dest & 0x80 else 0)
+
+
+def _check_discarded(index: FrameIndex, on_error: str):
+    if index.discarded:
+        message = f"Discarded {index.discarded} invalid bytes"
+        if on_error == "raise":
+            raise RuntimeError(message)
+        if on_error == "warn":
+            warnings.warn(message)
+
+
+def _tables(messages) -> Dict[int, Table]:
+    # Group (offset, message) pairs into one table per message id, with a column per
+    # field; messages of the same id with different fields are padded with None
+    by_type: Dict[type, List[tuple]] = {}
+    for offset, msg in messages:
+        rows = by_type.get(type(msg))
+        if rows is None:
+            rows = by_type[type(msg)] = []
+        rows.append((offset,) + tuple(msg))
+    by_msgid: Dict[int, List[Table]] = {}
+    for type_, rows in by_type.items():
+        msgid: int = type_.msgid  # type: ignore[attr-defined]
+        columns: Table = {
+            "frame_offset": [],
+            "msg": [type_.msg] * len(rows),  # type: ignore[attr-defined]
+            "msgid": [msgid] * len(rows),
+        }
+        fields = ("frame_offset",) + type_._fields  # type: ignore[attr-defined]
+        columns.update(zip(fields, map(list, zip(*rows))))
+        by_msgid.setdefault(msgid, []).append(columns)
+    return {
+        msgid: _concat(tables, sort=len(tables) > 1)
+        for msgid, tables in by_msgid.items()
+    }
+
+
+def _concat(tables: List[Table], sort: bool = False) -> Table:
+    # Join tables into new columns, each built once
+    names = list(dict.fromkeys(name for table in tables for name in table))
+    merged: Table = {name: [] for name in names}
+    for table in tables:
+        n = len(table["frame_offset"])
+        for name, column in merged.items():
+            values = table.get(name)
+            column.extend([None] * n if values is None else values)
+    if sort:
+        order = sorted(
+            range(len(merged["frame_offset"])), key=merged["frame_offset"].__getitem__
+        )
+        merged = {name: [column[i] for i in order] for name, column in merged.items()}
+    return merged
+
+
+def _decode_frames(buf, offsets) -> Dict[int, Table]:
+    messages = []
+    for offset in offsets:
+        data = buf[offset : _frame_end(buf, offset)]
+        messages.append((offset, _decode(data[0] | data[1] << 8, data, None)))
+    return _tables(messages)
+
+
+def _decode_shard(path: str, offsets) -> Dict[int, Table]:
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return _decode_frames(mm, offsets)
+
+
+def decode_capture(path: str, on_error: str = "warn") -> Dict[int, Table]:
+    """
+    Decode every message in a capture file, in this process.
+
+    See ``decode_capture_parallel()`` for the format of the result.
+
+    :param path: Path of the capture file.
+    :param on_error: Action to take if invalid data is detected, as for ``Unpacker``.
+    """
+    if os.path.getsize(path) == 0:
+        return {}
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        index = build_index(mm)
+        _check_discarded(index, on_error)
+        return _decode_frames(mm, index.offsets)
+
+
+def decode_capture_parallel(
+    path: str,
+    workers: Optional[int] = None,
+    shard_size: Optional[int] = None,
+    on_error: str = "warn",
+) -> Dict[int, Table]:
+    """
+    Decode every message in a capture file, using several processes.
+
+    The file is first indexed with ``build_index()``, and the index split into shards of
+    consecutive messages.
+    Worker processes then map the file into memory and decode one shard each, and their
+    results are concatenated in file order, so the result is the same as that of
+    ``decode_capture()``.
+
+    The result is columnar: one table per message id, each a dictionary of field name to
+    list of values, in the order the messages appear in the file.
+    The ``frame_offset`` column holds the position of each message in the file, which
+    also gives the order of messages of different types.
+    Where messages of the same id have different fields (short and long forms), missing
+    values are None.
+
+    :param path: Path of the capture file.
+    :param workers: Number of worker processes, defaults to the number of CPUs.
+    :param shard_size: Number of messages in each shard, defaults to a quarter of the
+        share of each worker.
+    :param on_error: Action to take if invalid data is detected, as for ``Unpacker``.
+    :returns: Table of each message id decoded.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    size = os.path.getsize(path)
+    if workers <= 1 or size == 0:
+        return decode_capture(path, on_error)
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        index = build_index(mm)
+    _check_discarded(index, on_error)
+    offsets = index.offsets
+    if shard_size is None:
+        shard_size = max(len(offsets) // (4 * workers), 1)
+    shards = [offsets[i : i + shard_size] for i in range(0, len(offsets), shard_size)]
+    parts: Dict[int, List[Table]] = {}
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        for tables in executor.map(_decode_shard, [path] * len(shards), shards):
+            for msgid, table in tables.items():
+                parts.setdefault(msgid, []).append(table)
+    return {msgid: _concat(tables) for msgid, tables in parts.items()}
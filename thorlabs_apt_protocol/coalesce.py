@@ -0,0 +1,113 @@
+__all__ = ["CoalescingWriter", "AsyncCoalescingWriter"]
+
+import asyncio
+import time
+from typing import Any, Callable, Optional
+
+
+class CoalescingWriter:
+    """
+    Join small outgoing messages into fewer, larger writes, with bounded latency.
+
+    Most messages are only 6 bytes, and writing each one separately costs a system call
+    and a USB transfer (through the FTDI chip of the controllers) every time.
+    Bytes given to ``write()`` are buffered instead, and written together once the
+    oldest has waited ``max_delay``, once ``max_size`` bytes are waiting, or when a
+    write asks to ``flush``.
+
+    The deadline is only checked on ``write()`` and ``poll()``: call ``poll()`` at least
+    every ``max_delay`` (``deadline`` tells when it is due), or use
+    ``AsyncCoalescingWriter``, which schedules it on the event loop.
+    ``writes`` and ``messages`` count the writes made and the messages (calls to
+    ``write()``) they carried.
+
+    :param write: Callable writing bytes to the controller, such as ``Serial.write``.
+    :param max_delay: Longest time bytes are buffered, in seconds.
+    :param max_size: Number of buffered bytes which are written at once.
+    :param clock: Callable returning the current time, in seconds.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[bytes], Any],
+        max_delay: float = 200e-6,
+        max_size: int = 64,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self._write = write
+        self.max_delay = max_delay
+        self.max_size = max_size
+        self.clock = clock
+        self.deadline: Optional[float] = None
+        self.writes = 0
+        self.messages = 0
+        self._buffer = bytearray()
+        self._count = 0
+
+    def write(self, data: bytes, flush: bool = False, now: Optional[float] = None):
+        """
+        Buffer bytes to write, writing the buffer if it is due.
+
+        :param data: Encoded message(s).
+        :param flush: Write the buffer now, with these bytes.
+        """
+        if now is None:
+            now = self.clock()
+        if self.deadline is None:
+            self.deadline = now + self.max_delay
+        self._buffer += data
+        self._count += 1
+        if flush or len(self._buffer) >= self.max_size or now >= self.deadline:
+            self.flush()
+
+    def poll(self, now: Optional[float] = None):
+        """Write the buffer if its deadline has passed."""
+        if self.deadline is not None:
+            if now is None:
+                now = self.clock()
+            if now >= self.deadline:
+                self.flush()
+
+    def flush(self):
+        """Write the buffer now."""
+        if self._buffer:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            self.writes += 1
+            self.messages += self._count
+            self._count = 0
+            self.deadline = None
+            self._write(data)
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.flush()
+
+
+class AsyncCoalescingWriter(CoalescingWriter):
+    """
+    ``CoalescingWriter`` which flushes on its deadline by itself, from the event loop.
+
+    Must be used from a running asyncio event loop.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._handle: Optional[asyncio.TimerHandle] = None
+
+    def write(self, data: bytes, flush: bool = False, now: Optional[float] = None):
+        super().write(data, flush, now)
+        if self.deadline is not None and self._handle is None:
+            loop = asyncio.get_running_loop()
+            self._handle = loop.call_later(self.max_delay, self.flush)
+
+    def flush(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        super().flush()
@@ -0,0 +1,255 @@
+__all__ = ["NEED_DATA", "RequestTimedOut", "DeviceSession", "Connection"]
+
+from collections import deque, namedtuple
+import inspect
+import struct
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from . import functions
+from .correlation import _SUBMSGID_REQUESTS, REQUEST_RESPONSE
+from .keepalive import STATUS_ACKS, KeepAlive
+from .parsing import HEADER_SIZE
+from .unpacker import Unpacker
+
+_ACK_IDS = frozenset(functions._msgid(f) for f in STATUS_ACKS.values())
+
+# Requests addressed to a channel, which is the first parameter (or the first data
+# field, in the long form) unless the first parameter is a sub-message id
+_CHANNEL_REQUESTS = (
+    frozenset(
+        functions._msgid(func)
+        for name, func in inspect.getmembers(functions, inspect.isfunction)
+        if "_req_" in name and "chan_ident" in inspect.signature(func).parameters
+    )
+    - _SUBMSGID_REQUESTS
+)
+
+
+class _NeedData:
+    def __repr__(self):
+        return "NEED_DATA"
+
+
+NEED_DATA = _NeedData()
+"""Returned by ``Connection.next_event()`` when more data must be received."""
+
+RequestTimedOut = namedtuple("RequestTimedOut", ["dest", "msgid", "chan_ident"])
+RequestTimedOut.__doc__ = "Event: no response to a request arrived in time."
+
+
+class DeviceSession:
+    """
+    State of the session with one controller address.
+
+    ``pending`` holds, per expected response message id, the deadline, ``submsgid``
+    and ``chan_ident`` of each outstanding request, oldest first (``submsgid`` and
+    ``chan_ident`` are None for requests which have none).
+    ``update_msgids`` are the status update messages received while updates are enabled,
+    which determine the acknowledgements to send.
+    """
+
+    __slots__ = (
+        "address",
+        "updates_enabled",
+        "update_msgids",
+        "homing",
+        "pending",
+        "last_received",
+    )
+
+    def __init__(self, address: int):
+        self.address = address
+        self.updates_enabled = False
+        self.update_msgids: Set[int] = set()
+        self.homing: Set[int] = set()
+        self.pending: Dict[int, Deque[Tuple[float, Optional[int], Optional[int]]]] = {}
+        self.last_received: Optional[float] = None
+
+    def __repr__(self):
+        return (
+            f"DeviceSession(address={self.address:#04x}, "
+            f"updates_enabled={self.updates_enabled}, homing={sorted(self.homing)}, "
+            f"pending={sum(len(q) for q in self.pending.values())})"
+        )
+
+
+class _Buffer:
+    # Reader for the Unpacker, discarding data as it is read
+    def __init__(self):
+        self.data = bytearray()
+
+    def read(self, size: int) -> bytes:
+        out = bytes(self.data[:size])
+        del self.data[:size]
+        return out
+
+
+class Connection:
+    """
+    Sans-io state machine of a session with the controllers on one port.
+
+    The ``Connection`` does no I/O itself, so the same code serves any transport
+    (blocking, threaded, asyncio or trio):
+
+    - bytes received from the port are given to ``receive_data()``;
+    - ``next_event()`` then returns each decoded message in turn, or ``RequestTimedOut``
+      when a request was not answered in time, or ``NEED_DATA`` once all are consumed;
+    - every encoded message (from the functions of this package) is passed through
+      ``send()``, which returns the bytes to write;
+    - ``acks_due()`` returns the status update acknowledgements which must be written
+      now to keep update messages flowing.
+
+    Along the way it tracks the state of each controller address, in ``sessions``:
+    whether update messages were started, the outstanding requests, when the next
+    acknowledgement is due (in ``keepalive``) and which channels are homing.
+
+    All methods taking ``now`` default to the current time of ``clock``.
+
+    :param source: Address of the host.
+    :param request_timeout: Time to wait for the response to a request, or None.
+    :param ack_interval: Time between status update acknowledgements.
+    :param on_error: Action to take if invalid data is received, as for ``Unpacker``.
+    :param clock: Callable returning the current time, in seconds.
+    """
+
+    def __init__(
+        self,
+        source: int = 0x01,
+        request_timeout: Optional[float] = 1.0,
+        ack_interval: float = 0.5,
+        on_error: str = "warn",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.source = source
+        self.request_timeout = request_timeout
+        self.ack_interval = ack_interval
+        self.clock = clock
+        self.sessions: Dict[int, DeviceSession] = {}
+        self.keepalive = KeepAlive(source, ack_interval, clock=clock)
+        self._buffer = _Buffer()
+        self._unpacker = Unpacker(self._buffer, on_error=on_error)
+        self._timeouts: Deque[RequestTimedOut] = deque()
+        self._next_deadline = float("inf")
+
+    def session(self, address: int) -> DeviceSession:
+        """The session with a controller address, created if needed."""
+        session = self.sessions.get(address)
+        if session is None:
+            session = self.sessions[address] = DeviceSession(address)
+        return session
+
+    def send(self, data: bytes, now: Optional[float] = None) -> bytes:
+        """
+        Account for an outgoing message, returning the bytes to write.
+
+        :param data: Encoded message.
+        """
+        if now is None:
+            now = self.clock()
+        msgid, _, dest = struct.unpack_from("<HHB", data)
+        session = self.session(dest & 0x7F)
+        submsgid = data[2] if msgid in _SUBMSGID_REQUESTS else None
+        chan_ident: Optional[int] = None
+        if msgid in _CHANNEL_REQUESTS:
+            if dest & 0x80:
+                (chan_ident,) = struct.unpack_from("<H", data, HEADER_SIZE)
+            else:
+                chan_ident = data[2]
+        if msgid == 0x0011:  # hw_start_updatemsgs
+            session.updates_enabled = True
+        elif msgid == 0x0012:  # hw_stop_updatemsgs
+            session.updates_enabled = False
+            session.update_msgids.clear()
+            self.keepalive.remove(None, session.address)
+        elif msgid == 0x0443:  # mot_move_home
+            session.homing.add(data[2])
+        elif msgid in _ACK_IDS:
+            self.keepalive.touch(None, session.address, now)
+        response = REQUEST_RESPONSE.get(msgid)
+        if response is not None:
+            queue = session.pending.get(response)
+            if queue is None:
+                queue = session.pending[response] = deque()
+            if self.request_timeout is None:
+                deadline = float("inf")
+            else:
+                deadline = now + self.request_timeout
+            queue.append((deadline, submsgid, chan_ident))
+            self._next_deadline = min(self._next_deadline, deadline)
+        return data
+
+    def receive_data(self, data: bytes):
+        """
+        Add bytes received from the port.
+
+        :param data: Received bytes.
+        """
+        self._buffer.data += data
+
+    def next_event(self, now: Optional[float] = None) -> Any:
+        """
+        The next event: a decoded message, a ``RequestTimedOut``, or ``NEED_DATA``.
+        """
+        if now is None:
+            now = self.clock()
+        self._expire(now)
+        if self._timeouts:
+            return self._timeouts.popleft()
+        try:
+            msg = next(self._unpacker)
+        except StopIteration:
+            return NEED_DATA
+        self._received(msg, now)
+        return msg
+
+    def events(self, now: Optional[float] = None) -> List[Any]:
+        """All events available now."""
+        out: List[Any] = []
+        while True:
+            event = self.next_event(now)
+            if event is NEED_DATA:
+                return out
+            out.append(event)
+
+    def _received(self, msg, now: float):
+        session = self.session(msg.source)
+        session.last_received = now
+        chan_ident = getattr(msg, "chan_ident", None)
+        if msg.msgid in (0x0444, 0x0466):  # mot_move_homed, mot_move_stopped
+            session.homing.discard(chan_ident)
+        elif msg.msgid in STATUS_ACKS and session.updates_enabled:
+            session.update_msgids.add(msg.msgid)
+            self.keepalive.update(None, msg, now)
+        queue = session.pending.get(msg.msgid)
+        if queue:
+            # The oldest request for the channel of the response, or for no channel
+            submsgid = getattr(msg, "submsgid", None)
+            for i, (_, sub, chan) in enumerate(queue):
+                if sub == submsgid and (
+                    chan_ident is None or chan is None or chan == chan_ident
+                ):
+                    del queue[i]
+                    break
+
+    def _expire(self, now: float):
+        if now < self._next_deadline:
+            return
+        self._next_deadline = float("inf")
+        for session in self.sessions.values():
+            for msgid, queue in session.pending.items():
+                while queue and queue[0][0] <= now:
+                    _, _, chan_ident = queue.popleft()
+                    self._timeouts.append(
+                        RequestTimedOut(session.address, msgid, chan_ident)
+                    )
+                if queue:
+                    self._next_deadline = min(self._next_deadline, queue[0][0])
+
+    def acks_due(self, now: Optional[float] = None) -> bytes:
+        """
+        The acknowledgements due now, for every controller sending status updates.
+
+        The bytes returned are accounted for (as by ``send()``) and must be written.
+        """
+        return self.keepalive.due(now).get(None, b"")
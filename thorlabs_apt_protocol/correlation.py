@@ -0,0 +1,251 @@
+__all__ = ["REQUEST_RESPONSE", "Correlator", "AsyncCorrelator"]
+
+import asyncio
+import collections
+import concurrent.futures
+import heapq
+import inspect
+import struct
+import time
+from typing import Any, Callable, Deque, Dict, FrozenSet, List, Optional, Tuple
+
+from . import functions
+from .messages import MESSAGE_CLASSES
+from .parsing import id_to_func
+
+
+def _request_response_table() -> Dict[int, int]:
+    # Derived from naming: ``x_req_y`` is answered by ``x_get_y``,
+    # or by ``x_get_params`` for the messages which use a sub-message id.
+    gets = {func.__name__: msgid for msgid, func in id_to_func.items()}
+    table: Dict[int, int] = {}
+    for name, func in inspect.getmembers(functions, inspect.isfunction):
+        if "_req_" not in name:
+            continue
+        prefix, _, suffix = name.partition("_req_")
+        get = gets.get(f"{prefix}_get_{suffix}", gets.get(f"{prefix}_get_params"))
+        if get is not None:
+            table.setdefault(functions._msgid(func), get)
+    return table
+
+
+REQUEST_RESPONSE = _request_response_table()
+"""Map of request message id to the message id of its response."""
+
+# Requests whose first parameter is a sub-message id, echoed in the response
+_SUBMSGID_REQUESTS: FrozenSet[int] = frozenset(
+    request
+    for request, response in REQUEST_RESPONSE.items()
+    if "submsgid" in getattr(MESSAGE_CLASSES.get(response), "_fields", ())
+)
+
+
+_Key = Tuple[int, int, Optional[int]]
+
+
+def _pop_match(queues: Dict[_Key, Deque], key: _Key, chan: Optional[int]) -> Any:
+    # Remove the oldest entry for the channel, or for no particular channel, or for any
+    # channel if ``chan`` is None, and return its value
+    queue = queues.get(key)
+    if not queue:
+        return None
+    for i, (c, value) in enumerate(queue):
+        if chan is None or c is None or c == chan:
+            del queue[i]
+            if not queue:
+                del queues[key]
+            return value
+    return None
+
+
+def _remove(queues: Dict[_Key, Deque], key: _Key, entry: Tuple):
+    queue = queues.get(key)
+    if queue is not None:
+        try:
+            queue.remove(entry)
+        except ValueError:
+            return
+        if not queue:
+            del queues[key]
+
+
+class Correlator:
+    """
+    Match responses to outstanding requests.
+
+    ``request()`` encodes and writes a request, returning a future which resolves to the
+    matching response message.
+    Every decoded message should be given to ``dispatch()`` (or use ``wait()`` to drive an
+    ``Unpacker`` until a future resolves).
+    Responses are matched by message id, source, ``submsgid`` (for the requests of
+    ``*_get_params`` messages) and ``chan_ident``, with outstanding requests resolved in
+    the order they were sent.
+    A response without a channel (such as ``mot_get_adcinputs``) resolves the oldest
+    request of any channel.
+
+    A request which times out is forgotten, but its response may still arrive late: a
+    matching response within another timeout is dropped, rather than resolving a newer
+    request.
+
+    Messages which do not resolve any request are passed to ``on_unmatched``, if given.
+
+    :param write: Callable used to send encoded requests, e.g. ``serial.Serial.write``.
+    :param source: Address of the host.
+    :param timeout: Default time, in seconds, to wait for a response.
+    :param on_unmatched: Callable taking each message which was not a response.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[bytes], Any],
+        source: int = 0x01,
+        timeout: Optional[float] = 1.0,
+        on_unmatched: Optional[Callable[[Any], Any]] = None,
+    ):
+        self.write = write
+        self.source = source
+        self.timeout = timeout
+        self.on_unmatched = on_unmatched
+        # Outstanding requests by response message id, source and submsgid: their
+        # channel and future, oldest first
+        self._pending: Dict[_Key, Deque[Tuple[Optional[int], Any]]] = {}
+        # Requests which timed out: their channel and the time until which their
+        # response is expected
+        self._late: Dict[_Key, Deque[Tuple[Optional[int], float]]] = {}
+        self._deadlines: List[Tuple[float, int, Any]] = []
+        self._late_deadlines: List[Tuple[float, int, _Key, Any]] = []
+
+    def _new_future(self, key: _Key, chan: Optional[int], timeout: Optional[float]):
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        if timeout is not None:
+            entry = (key, chan, future, timeout)
+            heapq.heappush(
+                self._deadlines, (time.monotonic() + timeout, id(future), entry)
+            )
+        return future
+
+    def request(
+        self,
+        func: Callable[..., bytes],
+        dest: int,
+        *,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ):
+        """
+        Send a request and return a future for its response.
+
+        :param func: Request function, e.g. ``mot_req_velparams``.
+        :param dest: Address of the controller.
+        :param timeout: Time in seconds to wait for the response, defaults to ``self.timeout``.
+        :param kwargs: Remaining parameters of ``func``, e.g. ``chan_ident``.
+        """
+        frame = func(dest=dest, source=self.source, **kwargs)
+        (msgid,) = struct.unpack_from("<H", frame)
+        if msgid not in REQUEST_RESPONSE:
+            raise ValueError(f"No known response for {func.__name__}")
+        submsgid = frame[2] if msgid in _SUBMSGID_REQUESTS else None
+        key = (REQUEST_RESPONSE[msgid], dest, submsgid)
+        chan = kwargs.get("chan_ident")
+        future = self._new_future(
+            key, chan, self.timeout if timeout is None else timeout
+        )
+        self._pending.setdefault(key, collections.deque()).append((chan, future))
+        self.write(frame)
+        return future
+
+    def dispatch(self, msg) -> bool:
+        """
+        Resolve the oldest outstanding request matching ``msg``.
+
+        :param msg: A decoded message.
+        :returns: True if the message was a response to an outstanding request.
+        """
+        self.expire()
+        key = (msg.msgid, msg.source, getattr(msg, "submsgid", None))
+        chan = getattr(msg, "chan_ident", None)
+        if _pop_match(self._late, key, chan) is None:
+            while True:
+                future = _pop_match(self._pending, key, chan)
+                if future is None:
+                    break
+                if not future.done():
+                    future.set_result(msg)
+                    return True
+        if self.on_unmatched is not None:
+            self.on_unmatched(msg)
+        return False
+
+    def _time_out(self, key: _Key, chan: Optional[int], future, until: float):
+        # Forget the request, but expect its response until ``until``
+        _remove(self._pending, key, (chan, future))
+        late = (chan, until)
+        self._late.setdefault(key, collections.deque()).append(late)
+        heapq.heappush(self._late_deadlines, (late[1], id(late), key, late))
+
+    def expire(self, now: Optional[float] = None):
+        """
+        Fail outstanding requests whose timeout has passed with ``TimeoutError``.
+
+        :param now: Current ``time.monotonic()``.
+        """
+        if not self._deadlines and not self._late_deadlines:
+            return
+        if now is None:
+            now = time.monotonic()
+        while self._late_deadlines and self._late_deadlines[0][0] <= now:
+            _, _, key, late = heapq.heappop(self._late_deadlines)
+            _remove(self._late, key, late)
+        while self._deadlines and self._deadlines[0][0] <= now:
+            deadline, _, (key, chan, future, timeout) = heapq.heappop(self._deadlines)
+            if not future.done():
+                self._time_out(key, chan, future, deadline + timeout)
+                future.set_exception(TimeoutError("No response to request"))
+
+    def wait(self, future, unpacker):
+        """
+        Read from ``unpacker`` until ``future`` is resolved, then return its result.
+
+        :param future: Future returned by ``request()``.
+        :param unpacker: ``Unpacker`` reading from the controller.
+        """
+        while not future.done():
+            for msg in unpacker:
+                self.dispatch(msg)
+                if future.done():
+                    break
+            self.expire()
+        return future.result()
+
+
+class AsyncCorrelator(Correlator):
+    """
+    ``Correlator`` returning asyncio futures.
+
+    Timeouts are scheduled on the event loop, and ``run()`` dispatches messages from an
+    ``Unpacker`` as a background task.
+    """
+
+    def _new_future(self, key: _Key, chan: Optional[int], timeout: Optional[float]):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if timeout is not None:
+            handle = loop.call_later(
+                timeout, self._time_out_future, key, chan, future, timeout
+            )
+            future.add_done_callback(lambda _: handle.cancel())
+        return future
+
+    def _time_out_future(self, key: _Key, chan: Optional[int], future, timeout: float):
+        if not future.done():
+            self._time_out(key, chan, future, time.monotonic() + timeout)
+            future.set_exception(asyncio.TimeoutError("No response to request"))
+
+    async def run(self, unpacker):
+        """
+        Dispatch every message from ``unpacker``, forever.
+
+        :param unpacker: ``Unpacker`` reading from the controller.
+        """
+        async for msg in unpacker:
+            self.dispatch(msg)
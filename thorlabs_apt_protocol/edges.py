@@ -0,0 +1,116 @@
+__all__ = ["StatusEdge", "StatusEdgeDetector"]
+
+from collections import namedtuple
+import struct
+import time
+from typing import Callable, Dict, Hashable, List, Optional
+
+from .parsing import STATUS_BITS, STATUS_MESSAGES
+
+StatusEdge = namedtuple(
+    "StatusEdge", ["source", "chan_ident", "name", "rising", "timestamp"]
+)
+StatusEdge.__doc__ = "A single status bit changing state."
+
+# For each layout, the name of each bit by mask
+_NAMES: Dict[str, Dict[int, str]] = {
+    layout: {mask: name for name, mask in bits.items()}
+    for layout, bits in STATUS_BITS.items()
+}
+
+
+class StatusEdgeDetector:
+    """
+    Report status bits as they change, rather than as whole bitfields.
+
+    Each status bitfield is compared (by XOR) with the previous bitfield of the same
+    source and channel, and a ``StatusEdge`` is emitted for each bit which changed.
+    The first bitfield seen from each channel is taken as the starting state, and emits
+    no edges.
+
+    Raw messages are given to ``feed_frame()``; the detector can also be used directly as
+    the ``frame_filter`` of an ``Unpacker``, in which case it lets every message through
+    and passes the edges to ``on_edge``.
+
+    :param on_edge: Callable taking each ``StatusEdge``, when used as a frame filter.
+    :param clock: Callable returning the time used to timestamp edges.
+    """
+
+    def __init__(
+        self,
+        on_edge: Optional[Callable[[StatusEdge], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.on_edge = on_edge
+        self.clock = clock
+        self._last: Dict[Hashable, int] = {}
+
+    def update(
+        self,
+        source: int,
+        chan_ident: Optional[int],
+        layout: str,
+        status_bits: int,
+        timestamp: Optional[float] = None,
+    ) -> List[StatusEdge]:
+        """
+        Compare a status bitfield with the previous one of the same channel.
+
+        :param source: Address of the controller.
+        :param chan_ident: Channel, or None.
+        :param layout: Bitfield layout, one of the keys of ``parsing.STATUS_BITS``.
+        :param status_bits: The bitfield, as an integer.
+        :param timestamp: Time of the edges, defaults to the current time of ``clock``.
+        :returns: An edge for each bit which changed.
+        """
+        key = (source, chan_ident, layout)
+        previous = self._last.get(key)
+        self._last[key] = status_bits
+        if previous is None:
+            return []
+        changed = previous ^ status_bits
+        if not changed:
+            return []
+        if timestamp is None:
+            timestamp = self.clock()
+        names = _NAMES[layout]
+        edges = []
+        while changed:
+            bit = changed & -changed
+            changed ^= bit
+            name = names.get(bit) or f"bit{bit.bit_length() - 1}"
+            edges.append(
+                StatusEdge(source, chan_ident, name, bool(status_bits & bit), timestamp)
+            )
+        return edges
+
+    def feed_frame(self, data: bytes, timestamp: Optional[float] = None):
+        """
+        Check the status bits of a raw message, if it has any.
+
+        :param data: Bytes of a complete message.
+        :param timestamp: Time of the edges, defaults to the current time of ``clock``.
+        :returns: An edge for each bit which changed.
+        """
+        msgid = data[0] | data[1] << 8
+        entry = STATUS_MESSAGES.get(msgid)
+        # Short form end of move messages have no status bits
+        if entry is None or not data[4] & 0x80:
+            return []
+        layout, offset, has_chan = entry
+        if len(data) < offset + 4:
+            return []
+        (status_bits,) = struct.unpack_from("<L", data, offset)
+        chan_ident = data[6] | data[7] << 8 if has_chan else None
+        return self.update(data[5], chan_ident, layout, status_bits, timestamp)
+
+    def __call__(self, data: bytes) -> bool:
+        edges = self.feed_frame(data)
+        if self.on_edge is not None:
+            for edge in edges:
+                self.on_edge(edge)
+        return True
+
+    def reset(self):
+        """Forget the previous state of all channels."""
+        self._last.clear()
@@ -0,0 +1,482 @@
+"""Emulated APT controllers, for testing without hardware."""
+
+__all__ = ["EmulatedController", "PtyEmulator"]
+
+import functools
+import os
+import random
+import select
+import struct
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .functions import _pack
+from .unpacker import MAX_DATA_LENGTH, VALID_DESTS, VALID_SOURCES
+
+HOST = 0x01
+RACK = 0x11
+BAYS = tuple(range(0x21, 0x2B))
+
+_handlers: Dict[int, Callable] = {}
+
+_PARAMETER_BLOCKS = (
+    # set, req, get message ids and data length
+    (0x0413, 0x0414, 0x0415, 14),  # velparams
+    (0x0416, 0x0417, 0x0418, 22),  # jogparams
+    (0x0426, 0x0427, 0x0428, 6),  # powerparams
+    (0x043A, 0x043B, 0x043C, 6),  # genmoveparams
+    (0x0445, 0x0446, 0x0447, 6),  # moverelparams
+    (0x0450, 0x0451, 0x0452, 6),  # moveabsparams
+    (0x0440, 0x0441, 0x0442, 14),  # homeparams
+    (0x0423, 0x0424, 0x0425, 16),  # limswitchparams
+    (0x04F4, 0x04F5, 0x04F6, 4),  # bowindex
+    (0x04A0, 0x04A1, 0x04A2, 20),  # dcpidparams
+)
+
+
+def _handler(msgid):
+    def wrapper(func):
+        if msgid in _handlers:
+            raise ValueError(f"Duplicate msgid: {hex(msgid)}")
+        _handlers[msgid] = func
+        return func
+
+    return wrapper
+
+
+class _Channel:
+    """State of one emulated motor channel."""
+
+    def __init__(self, address: int, chan_ident: int):
+        self.address = address
+        self.chan_ident = chan_ident
+        self.position = 0
+        self.velocity = 0
+        self.target = 0
+        self.homing = False
+        self.homed = False
+        # Parameter blocks, keyed by the message id of their "get" message
+        self.blocks = {
+            get: struct.pack("<H", chan_ident) + bytes(size - 2)
+            for _, _, get, size in _PARAMETER_BLOCKS
+        }
+        self.blocks[0x0415] = struct.pack("<H3l", chan_ident, 0, 4506, 21987328)
+
+    @property
+    def status_bits(self) -> int:
+        bits = 0x100 | 0x80000000  # motor_connected, channel_enabled
+        if self.velocity > 0:
+            bits |= 0x10
+        elif self.velocity < 0:
+            bits |= 0x20
+        if self.homing:
+            bits |= 0x200
+        if self.homed:
+            bits |= 0x400
+        return bits
+
+    def dcstatus(self) -> bytes:
+        return struct.pack(
+            "<HlhHL",
+            self.chan_ident,
+            self.position,
+            max(-0x8000, min(0x7FFF, self.velocity)),
+            0,
+            self.status_bits,
+        )
+
+
+class EmulatedController:
+    """
+    Sans-io model of an APT motor controller, or a rack of controller bays.
+
+    Requests from the host are given to ``receive_data()``, and the frames the controller
+    sends back are collected with ``data_to_send()``.
+    Time only advances when ``tick()`` is called, which moves the channels and emits
+    ``mot_get_dcstatusupdate`` messages while update messages are enabled.
+
+    If ``bays`` is given, the controller is a rack at ``address`` (normally ``0x11``) with
+    one single channel controller at each of the given bay addresses (``0x21`` to ``0x2A``).
+    Otherwise it is a single controller at ``address`` (normally ``0x50``) with
+    ``channels`` channels.
+
+    :param address: Address of the controller or rack.
+    :param channels: Number of channels of a stand-alone controller.
+    :param bays: Bay addresses populated in a rack.
+    :param update_rate: Rate of status update messages, in Hz.
+    :param speed: Speed of emulated moves, in encoder counts per second.
+    :param noise: Probability of inserting random bytes before each outgoing frame.
+    :param seed: Seed for the random number generator used for noise.
+    """
+
+    def __init__(
+        self,
+        address: int = 0x50,
+        channels: int = 1,
+        bays: Optional[Sequence[int]] = None,
+        update_rate: float = 10.0,
+        speed: int = 20000,
+        noise: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.address = address
+        self.bays = tuple(bays) if bays is not None else ()
+        if self.bays:
+            self.channels = {(bay, 1): _Channel(bay, 1) for bay in self.bays}
+        else:
+            self.channels = {
+                (address, i): _Channel(address, i) for i in range(1, channels + 1)
+            }
+        self.update_interval = 1 / update_rate if update_rate else None
+        self.speed = speed
+        self.noise = noise
+        self.updates_enabled = False
+        # Synchronized move arrays by (address, array_id), and their end index
+        self.trajectories: Dict[Tuple[int, int], List[Tuple[int, ...]]] = {}
+        self.trajectory_ends: Dict[Tuple[int, int], int] = {}
+        self._rng = random.Random(seed)
+        self._in = b""
+        self._out: List[bytes] = []
+        self._now: Optional[float] = None
+        self._next_update = 0.0
+
+    def _addresses(self):
+        return (self.address,) + self.bays
+
+    def _send(self, frame: bytes):
+        if self.noise and self._rng.random() < self.noise:
+            n = self._rng.randrange(1, 9)
+            self._out.append(bytes(self._rng.randrange(256) for _ in range(n)))
+        self._out.append(frame)
+
+    def receive_data(self, data: bytes):
+        """
+        Process bytes sent by the host.
+
+        Frames for other addresses are ignored.
+        As in ``Unpacker``, a header with a message ID the controller does not know,
+        implausible addresses, or claiming more than ``MAX_DATA_LENGTH`` bytes of data
+        is not a frame: bytes are skipped one at a time until the next plausible header.
+
+        :param data: Bytes received from the host.
+        """
+        self._in += data
+        while len(self._in) >= 6:
+            msgid, length, dest, source = struct.unpack_from("<HHBB", self._in)
+            if (
+                msgid not in _handlers
+                or dest & 0x7F not in VALID_SOURCES
+                or source not in VALID_DESTS
+                or (dest & 0x80 and length > MAX_DATA_LENGTH)
+            ):
+                self._in = self._in[1:]
+                continue
+            size = 6 + length if dest & 0x80 else 6
+            if len(self._in) < size:
+                break
+            frame, self._in = self._in[:size], self._in[size:]
+            dest &= 0x7F
+            if dest in self._addresses():
+                _handlers[msgid](self, frame, dest, source)
+
+    def data_to_send(self) -> bytes:
+        """Collect the bytes which the controller has queued for the host."""
+        out = b"".join(self._out)
+        self._out.clear()
+        return out
+
+    def tick(self, now: Optional[float] = None):
+        """
+        Advance the emulation to ``now``.
+
+        :param now: Time in seconds, defaults to ``time.monotonic()``.
+        """
+        if now is None:
+            now = time.monotonic()
+        dt = 0.0 if self._now is None else now - self._now
+        self._now = now
+        for channel in self.channels.values():
+            self._advance(channel, dt)
+        if self.updates_enabled and self.update_interval and now >= self._next_update:
+            self._next_update = now + self.update_interval
+            for channel in self.channels.values():
+                self._send(
+                    _pack(0x0491, HOST, channel.address, data=channel.dcstatus())
+                )
+
+    def _advance(self, channel: _Channel, dt: float):
+        if channel.velocity == 0:
+            return
+        remaining = channel.target - channel.position
+        step = int(self.speed * dt)
+        if abs(remaining) <= step:
+            channel.position = channel.target
+            channel.velocity = 0
+            self._finish_move(channel)
+        else:
+            channel.position += step if remaining > 0 else -step
+
+    def _start_move(self, channel: _Channel, target: int):
+        channel.target = target
+        if target == channel.position:
+            self._finish_move(channel)
+        else:
+            direction = 1 if target > channel.position else -1
+            channel.velocity = direction * min(self.speed, 0x7FFF)
+
+    def _finish_move(self, channel: _Channel):
+        if channel.homing:
+            channel.homing = False
+            channel.homed = True
+            self._send(_pack(0x0444, HOST, channel.address, param1=channel.chan_ident))
+        else:
+            self._send(_pack(0x0464, HOST, channel.address, data=channel.dcstatus()))
+
+    def _channel(self, frame: bytes, dest: int) -> Optional[_Channel]:
+        # Short form messages carry chan_ident in the first parameter byte,
+        # long form messages in the first word of the data packet
+        if frame[4] & 0x80:
+            (chan_ident,) = struct.unpack_from("<H", frame, 6)
+        else:
+            chan_ident = frame[2]
+        return self.channels.get((dest, chan_ident))
+
+
+@_handler(0x0005)
+def _hw_req_info(self, frame, dest, source):
+    model = b"RACK\x00\x00\x00\x00" if dest == RACK else b"KDC101\x00\x00"
+    nchs = len(self.bays) if dest == RACK else len(self.channels)
+    data = struct.pack(
+        "<l8sH4B48s12sHHH",
+        27000000 + dest,
+        model,
+        16,
+        0,
+        3,
+        0,
+        2,
+        b"",
+        b"\x00" * 10 + b"\x10\x00",
+        1,
+        0,
+        nchs,
+    )
+    self._send(_pack(0x0006, HOST, dest, data=data))
+
+
+@_handler(0x0011)
+def _hw_start_updatemsgs(self, frame, dest, source):
+    self.updates_enabled = True
+
+
+@_handler(0x0012)
+def _hw_stop_updatemsgs(self, frame, dest, source):
+    self.updates_enabled = False
+
+
+@_handler(0x0060)
+def _rack_req_bayused(self, frame, dest, source):
+    bay_ident = frame[2]
+    occupied = bay_ident < len(BAYS) and BAYS[bay_ident] in self.bays
+    self._send(_pack(0x0061, HOST, dest, param1=bay_ident, param2=1 if occupied else 2))
+
+
+@_handler(0x0410)
+def _mot_set_poscounter(self, frame, dest, source):
+    channel = self._channel(frame, dest)
+    if channel is not None:
+        (channel.position,) = struct.unpack_from("<l", frame, 8)
+        channel.target = channel.position
+
+
+@_handler(0x0411)
+def _mot_req_poscounter(self, frame, dest, source):
+    channel = self._channel(frame, dest)
+    if channel is not None:
+        data = struct.pack("<Hl", channel.chan_ident, channel.position)
+        self._send(_pack(0x0412, HOST, dest, data=data))
+
+
+def _set_block(self, frame, dest, source, get):
+    channel = self._channel(frame, dest)
+    if channel is not None and frame[4] & 0x80:
+        channel.blocks[get] = frame[6 : 6 + len(channel.blocks[get])]
+
+
+def _req_block(self, frame, dest, source, get):
+    channel = self._channel(frame, dest)
+    if channel is not None:
+        self._send(_pack(get, HOST, dest, data=channel.blocks[get]))
+
+
+for _set, _req, _get, _ in _PARAMETER_BLOCKS:
+    _handler(_set)(functools.partial(_set_block, get=_get))
+    _handler(_req)(functools.partial(_req_block, get=_get))
+
+
+@_handler(0x0443)
+def _mot_move_home(self, frame, dest, source):
+    channel = self._channel(frame, dest)
+    if channel is not None:
+        channel.homing = True
+        channel.homed = False
+        self._start_move(channel, 0)
+
+
+@_handler(0x0448)
+def _mot_move_relative(self, frame, dest, source):
+    channel = self._channel(frame, dest)
+    if channel is not None:
+        if frame[4] & 0x80:
+            (distance,) = struct.unpack_from("<l", frame, 8)
+        else:
+            (distance,) = struct.unpack_from("<l", channel.blocks[0x0447], 2)
+        self._start_move(channel, channel.position + distance)
+
+
+@_handler(0x0453)
+def _mot_move_absolute(self, frame, dest, source):
+    channel = self._channel(frame, dest)
+    if channel is not None:
+        if frame[4] & 0x80:
+            (position,) = struct.unpack_from("<l", frame, 8)
+        else:
+            (position,) = struct.unpack_from("<l", channel.blocks[0x0452], 2)
+        self._start_move(channel, position)
+
+
+@_handler(0x0465)
+def _mot_move_stop(self, frame, dest, source):
+    channel = self._channel(frame, dest)
+    if channel is not None:
+        channel.velocity = 0
+        channel.homing = False
+        channel.target = channel.position
+        self._send(_pack(0x0466, HOST, dest, data=channel.dcstatus()))
+
+
+@_handler(0x0480)
+def _mot_req_statusupdate(self, frame, dest, source):
+    channel = self._channel(frame, dest)
+    if channel is not None:
+        data = struct.pack(
+            "<HllL",
+            channel.chan_ident,
+            channel.position,
+            channel.position,
+            channel.status_bits,
+        )
+        self._send(_pack(0x0481, HOST, dest, data=data))
+
+
+@_handler(0x0490)
+def _mot_req_dcstatusupdate(self, frame, dest, source):
+    channel = self._channel(frame, dest)
+    if channel is not None:
+        self._send(_pack(0x0491, HOST, dest, data=channel.dcstatus()))
+
+
+@_handler(0x0492)
+def _mot_ack_dcstatusupdate(self, frame, dest, source):
+    pass
+
+
+@_handler(0x0A00)
+def _mot_set_movesyncharray(self, frame, dest, source):
+    array_id, channels, num_points, start_ix = struct.unpack_from("<4H", frame, 6)
+    per_point = 1 + bin(channels).count("1")
+    values = struct.unpack_from(f"<{num_points * per_point}l", frame, 14)
+    points = self.trajectories.setdefault((dest, array_id), [])
+    del points[start_ix:]
+    points.extend(values[i : i + per_point] for i in range(0, len(values), per_point))
+
+
+@_handler(0x0A03)
+def _mot_set_movesynchparams(self, frame, dest, source):
+    array_id, _, _, _, end_ix = struct.unpack_from("<5H", frame, 6)
+    self.trajectory_ends[(dest, array_id)] = end_ix
+
+
+@_handler(0x0A06)
+def _mot_move_synchstart(self, frame, dest, source):
+    # Moves straight to the end point, the timing of the points is not emulated
+    array_id, channels, _ = struct.unpack_from("<3H", frame, 6)
+    points = self.trajectories.get((dest, array_id))
+    if not points:
+        return
+    end = self.trajectory_ends.get((dest, array_id), len(points) - 1)
+    point = points[min(end, len(points) - 1)]
+    chan_idents = [i + 1 for i in range(16) if channels >> i & 1]
+    for chan_ident, position in zip(chan_idents, point[1:]):
+        channel = self.channels.get((dest, chan_ident))
+        if channel is not None:
+            self._start_move(channel, position)
+
+
+class PtyEmulator:
+    """
+    Serve an ``EmulatedController`` on a pseudo-terminal.
+
+    The emulator runs in a background thread.
+    The ``port`` attribute is the path of the terminal device, which can be opened with
+    pyserial (or any other file API) just as a real controller would be::
+
+        with PtyEmulator(EmulatedController(bays=range(0x21, 0x2B), address=0x11)) as emu:
+            port = serial.Serial(emu.port, 115200, timeout=0.1)
+
+    This is only available on POSIX platforms.
+
+    :param controller: The controller model to serve, defaults to a single channel controller.
+    :param poll_interval: Maximum time, in seconds, between emulation ticks.
+    """
+
+    def __init__(
+        self,
+        controller: Optional[EmulatedController] = None,
+        poll_interval: float = 0.001,
+    ):
+        import tty
+
+        self.controller = controller if controller is not None else EmulatedController()
+        self.poll_interval = poll_interval
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Start serving in a background thread."""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving and close the pseudo-terminal."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        os.close(self._master)
+        os.close(self._slave)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.is_set():
+            readable, _, _ = select.select([self._master], [], [], self.poll_interval)
+            if readable:
+                try:
+                    data = os.read(self._master, 4096)
+                except OSError:
+                    break
+                self.controller.receive_data(data)
+            self.controller.tick()
+            out = self.controller.data_to_send()
+            while out:
+                n = os.write(self._master, out)
+                out = out[n:]
@@ -0,0 +1,312 @@
+"""
+Export of message streams to columnar files: numpy ``.npz`` or Apache Arrow IPC.
+
+There is one table per message type, with one column per field.
+Status bitfields are kept as a single integer ``status_bits`` column rather than a
+column per flag (see ``parsing.STATUS_BITS`` for the meaning of each bit).
+Messages are buffered undecoded and decoded a batch at a time; the high rate status
+updates and telemetry of fixed layout (those with generated decoders in ``fastpath``,
+and ``la_get_statusupdate``, ``ld_get_statusupdate``, ``tec_get_statusupdate`` and
+``pz_get_nttiareading``) are decoded by viewing the whole batch as a numpy structured
+array, without any per-message Python code.
+Other messages are decoded one at a time by their parser.
+
+In ``.npz`` files the arrays are named ``<table>/<column>``.
+Arrow output is a directory with one ``<table>.arrow`` file per table.
+
+Requires numpy, and pyarrow for Arrow output.
+"""
+
+__all__ = ["Exporter", "export_capture"]
+
+import mmap
+import os
+import struct
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import zipfile
+
+import numpy as np
+
+from .capture import build_index
+from .fastpath import _SPECS
+from .parsing import HEADER_SIZE, STATUS_MESSAGES, id_to_func
+from .unpacker import RawFrame
+
+_DTYPES = {"H": "<u2", "h": "<i2", "L": "<u4", "l": "<i4", "f": "<f4"}
+
+# Message id: data format and field names (None for reserved), of the messages decoded
+# as structured arrays
+_LAYOUTS: Dict[int, Tuple[str, Sequence[Optional[str]]]] = {
+    msgid: (fmt, names) for msgid, (fmt, names, _) in _SPECS.items()
+}
+_LAYOUTS.update(
+    {
+        0x0821: ("HHL", ("laser_current", "laser_power", "status_bits")),
+        0x0826: (
+            "hHhLL",
+            ("laser_current", "photo_current", "laser_voltage", None, "status_bits"),
+        ),
+        0x0861: ("hhHL", ("current", "temp_actual", "temp_set", "status_bits")),
+        0x063A: ("fHHH", ("abs_reading", "rel_reading", "range", "under_over_read")),
+    }
+)
+
+
+def _layout_dtype(msgid: int) -> np.dtype:
+    fmt, names = _LAYOUTS[msgid]
+    fields = [("msgid", "<u2"), ("length", "<u2"), ("dest", "u1"), ("source", "u1")]
+    for i, (char, name) in enumerate(zip(fmt, names)):
+        fields.append((name or f"_reserved{i}", _DTYPES[char]))
+    return np.dtype(fields)
+
+
+_LAYOUT_DTYPES = {msgid: _layout_dtype(msgid) for msgid in _LAYOUTS}
+
+
+def _status_fields(msgid: int, frame: bytes) -> Tuple[str, ...]:
+    # Names of the fields derived from the status bitfield: those which differ between
+    # copies of the message with all bits clear and all bits set
+    entry = STATUS_MESSAGES.get(msgid)
+    if entry is None or not frame[4] & 0x80 or len(frame) < entry[1] + 4:
+        return ()
+    offset = entry[1]
+    clear = bytearray(frame)
+    clear[offset : offset + 4] = bytes(4)
+    set_ = bytearray(frame)
+    set_[offset : offset + 4] = b"\xff" * 4
+    clear_fields = id_to_func[msgid](bytes(clear))
+    set_fields = id_to_func[msgid](bytes(set_))
+    return tuple(k for k, v in clear_fields.items() if set_fields[k] != v)
+
+
+def _decode_batch(msgid: int, frames: List[bytes]) -> Dict[str, np.ndarray]:
+    dtype = _LAYOUT_DTYPES.get(msgid)
+    if dtype is not None and len(frames[0]) == dtype.itemsize:
+        array = np.frombuffer(b"".join(frames), dtype)
+        columns = {"dest": array["dest"] & 0x7F, "source": array["source"]}
+        for name in (dtype.names or ())[4:]:
+            if not name.startswith("_reserved"):
+                columns[name] = array[name]
+        return columns
+    decoded = [id_to_func[msgid](frame) for frame in frames]
+    status = _status_fields(msgid, frames[0])
+    skip = {"msg", "msgid", *status}
+    columns = {}
+    for name in decoded[0]:
+        if name not in skip:
+            column = np.asarray([fields[name] for fields in decoded])
+            if column.dtype.kind == "O":
+                column = column.astype(str)
+            columns[name] = column
+    if status:
+        offset = STATUS_MESSAGES[msgid][1]
+        columns["status_bits"] = np.fromiter(
+            (struct.unpack_from("<L", frame, offset)[0] for frame in frames),
+            np.uint32,
+            len(frames),
+        )
+    return columns
+
+
+class _NpzColumn:
+    # Column appended to a temporary file, batch by batch
+    def __init__(self, column: np.ndarray):
+        self.dtype = column.dtype
+        self.shape = column.shape[1:]
+        self.rows = 0
+        self.file = tempfile.TemporaryFile()
+
+    def append(self, column: np.ndarray):
+        column = np.ascontiguousarray(column, dtype=self.dtype)
+        if column.shape[1:] != self.shape:
+            raise ValueError(f"Column shape changed from {self.shape}")
+        self.file.write(column.tobytes())
+        self.rows += len(column)
+
+
+class _NpzWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self.columns: Dict[str, _NpzColumn] = {}
+
+    def write(self, table: str, columns: Dict[str, np.ndarray]):
+        for name, column in columns.items():
+            key = f"{table}/{name}"
+            sink = self.columns.get(key)
+            if sink is None:
+                sink = self.columns[key] = _NpzColumn(column)
+            sink.append(column)
+
+    def close(self):
+        with zipfile.ZipFile(self.path, "w", allowZip64=True) as archive:
+            for key, sink in self.columns.items():
+                header = {
+                    "descr": np.lib.format.dtype_to_descr(sink.dtype),
+                    "fortran_order": False,
+                    "shape": (sink.rows,) + sink.shape,
+                }
+                with archive.open(key + ".npy", "w", force_zip64=True) as out:
+                    np.lib.format.write_array_header_2_0(out, header)
+                    sink.file.seek(0)
+                    while True:
+                        chunk = sink.file.read(1 << 20)
+                        if not chunk:
+                            break
+                        out.write(chunk)
+                sink.file.close()
+
+
+class _ArrowWriter:
+    def __init__(self, path: str):
+        import pyarrow
+
+        self.pa = pyarrow
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.writers: Dict[str, Any] = {}
+        self.schemas: Dict[str, Any] = {}
+
+    def write(self, table: str, columns: Dict[str, np.ndarray]):
+        pa = self.pa
+        arrays = [
+            pa.array(column.tolist() if column.ndim > 1 else column)
+            for column in columns.values()
+        ]
+        writer = self.writers.get(table)
+        if writer is None:
+            schema = self.schemas[table] = pa.schema(
+                [pa.field(name, a.type) for name, a in zip(columns, arrays)]
+            )
+            path = os.path.join(self.path, table + ".arrow")
+            writer = self.writers[table] = pa.ipc.new_file(path, schema)
+        schema = self.schemas[table]
+        arrays = [a.cast(field.type) for a, field in zip(arrays, schema)]
+        writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+
+
+class Exporter:
+    """
+    Write messages to columnar files, in batches.
+
+    Give each message (bytes of a complete message, or a ``RawFrame``) to ``write()``,
+    or iterate an ``Unpacker`` created with ``raw=True`` with ``consume()``, then
+    ``close()``.
+    Messages of each type are buffered until ``batch_size`` of them are waiting, then
+    decoded and written together, so memory use does not grow with the stream.
+    The ``.npz`` format is only written on ``close()``, from columns kept in temporary
+    files in the meantime.
+
+    Tables are named after the message.
+    Short form messages which also have a long form with status bits (such as
+    ``mot_move_completed``) go to a separate ``<message>_short`` table, and long form
+    messages of unexpected length to a ``<message>_<length>`` table.
+
+    :param path: Output ``.npz`` file, or directory for Arrow files.
+    :param format: ``npz`` or ``arrow``, by default ``npz`` if ``path`` ends in ``.npz``.
+    :param batch_size: Number of messages of one type to decode at once.
+    """
+
+    def __init__(
+        self, path: str, format: Optional[str] = None, batch_size: int = 65536
+    ):
+        if format is None:
+            format = "npz" if str(path).endswith(".npz") else "arrow"
+        if format == "npz":
+            self._writer: Any = _NpzWriter(path)
+        elif format == "arrow":
+            self._writer = _ArrowWriter(path)
+        else:
+            raise ValueError(f"Unknown format {format!r}")
+        self.batch_size = batch_size
+        self._pending: Dict[Tuple[int, int], List[bytes]] = {}
+        self._names: Dict[Tuple[int, int], str] = {}
+        self._lengths: Dict[int, int] = {}
+
+    def _table(self, key: Tuple[int, int]) -> str:
+        msgid, length = key
+        name = id_to_func[msgid].__name__
+        if length == HEADER_SIZE:
+            if msgid in STATUS_MESSAGES:
+                name += "_short"
+        elif self._lengths.setdefault(msgid, length) != length:
+            name += f"_{length - HEADER_SIZE}"
+        return name
+
+    def write(self, frame):
+        """
+        Add a message.
+
+        :param frame: Bytes of a complete message, or a ``RawFrame``.
+        """
+        if isinstance(frame, RawFrame):
+            frame = frame.data
+        msgid = frame[0] | frame[1] << 8
+        length = len(frame) if frame[4] & 0x80 else HEADER_SIZE
+        key = (msgid, length)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = []
+            if key not in self._names:
+                self._names[key] = self._table(key)
+        pending.append(frame)
+        if len(pending) >= self.batch_size:
+            self._flush(key)
+
+    def consume(self, unpacker):
+        """
+        Write every frame from ``unpacker``.
+
+        :param unpacker: ``Unpacker`` created with ``raw=True`` (or any iterable of
+            messages as bytes).
+        """
+        for frame in unpacker:
+            self.write(frame)
+
+    def _flush(self, key: Tuple[int, int]):
+        frames = self._pending.pop(key, None)
+        if frames:
+            self._writer.write(self._names[key], _decode_batch(key[0], frames))
+
+    def flush(self):
+        """Decode and write all buffered messages."""
+        for key in list(self._pending):
+            self._flush(key)
+
+    def close(self):
+        """Write all buffered messages and close the output."""
+        self.flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def export_capture(
+    capture: str, path: str, format: Optional[str] = None, batch_size: int = 65536
+):
+    """
+    Export every message in a capture file (see ``capture``) to columnar files.
+
+    :param capture: Path of the capture file.
+    :param path: Output ``.npz`` file, or directory for Arrow files.
+    :param format: ``npz`` or ``arrow``, by default ``npz`` if ``path`` ends in ``.npz``.
+    :param batch_size: Number of messages of one type to decode at once.
+    """
+    with Exporter(path, format, batch_size) as exporter:
+        if os.path.getsize(capture) == 0:
+            return
+        with open(capture, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                index = build_index(mm)
+                for offset in index.offsets:
+                    _, length, dest, _ = struct.unpack_from("<HHBB", mm, offset)
+                    end = offset + HEADER_SIZE + (length if dest & 0x80 else 0)
+                    exporter.write(mm[offset:end])
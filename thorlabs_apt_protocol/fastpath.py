@@ -0,0 +1,119 @@
+"""
+Generated decoders for the highest rate messages.
+
+The generic path of the ``Unpacker`` calls the registered parser, which builds a dict
+from the header, updates it with a dict of the data fields (and another of the status
+bits), and only then builds the message.
+For the periodic status updates this module instead generates, at import time, one
+straight-line function per message which does a single ``Struct.unpack_from`` of the
+whole message and constructs the message directly.
+
+The generated code is derived from the registered parsers themselves: field names and
+order are taken from parsing an empty message, and the mask of each status flag by
+probing the status bit parser one bit at a time.
+The results are identical to the generic path.
+"""
+
+__all__ = ["decoders", "stamped_decoders"]
+
+import struct
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+from . import parsing
+from .messages import message_class
+from .parsing import id_to_func
+
+# Message id: data format, data field names (None for reserved), status bit parser
+_SPECS: Dict[int, Tuple[str, Sequence[Optional[str]], Callable]] = {
+    0x0491: (  # mot_get_dcstatusupdate
+        "HlhHL",
+        ("chan_ident", "position", "velocity", None, "status_bits"),
+        parsing._parse_status_bits,
+    ),
+    0x0481: (  # mot_get_statusupdate
+        "HllL",
+        ("chan_ident", "position", "enc_count", "status_bits"),
+        parsing._parse_status_bits,
+    ),
+    0x0661: (  # pz_get_pzstatusupdate
+        "HhhL",
+        ("chan_ident", "output_voltage", "position", "status_bits"),
+        parsing._parse_pz_status_bits,
+    ),
+    0x0881: (  # quad_get_statusupdate
+        "hhHhhL",
+        ("x_diff", "y_diff", "sum", "x_pos", "y_pos", "status_bits"),
+        parsing._parse_quad_status_bits,
+    ),
+    0x08E1: (  # pzmot_get_statusupdate
+        "HllL",
+        ("chan_ident", "position", None, "status_bits"),
+        parsing._parse_pzmot_status_bits,
+    ),
+}
+
+
+def _masks(parse_bits: Callable) -> Dict[str, object]:
+    # Mask of each flag (or list of masks, for list fields), found one bit at a time
+    zero = parse_bits(0)
+    masks: Dict[str, object] = {
+        k: [0] * len(v) if isinstance(v, list) else 0 for k, v in zero.items()
+    }
+    for i in range(32):
+        for k, v in parse_bits(1 << i).items():
+            if isinstance(v, list):
+                for j, item in enumerate(v):
+                    if item:
+                        masks[k][j] |= 1 << i  # type: ignore
+            elif v and not zero[k]:
+                masks[k] |= 1 << i  # type: ignore
+            elif v != zero[k]:
+                raise ValueError(f"Can not generate decoder for field {k}")
+    return masks
+
+
+def _generate(msgid: int, stamped: bool):
+    fmt, names, parse_bits = _SPECS[msgid]
+    func = id_to_func[msgid]
+    length = struct.calcsize("<" + fmt)
+    # Parse an empty message with the generic parser to find the fields and their order
+    empty = struct.pack("<HHBB", msgid, length, 0x81, 0) + bytes(length)
+    fields = tuple(func(empty))[2:]  # msg and msgid are class attributes
+    if stamped:
+        fields += ("timestamp",)
+    masks = _masks(parse_bits)
+    targets = ["_", "_", "dest", "source"] + [n or "_" for n in names]
+    args = []
+    for field in fields:
+        if field == "dest":
+            args.append("dest & 0x7F")
+        elif field in masks:
+            mask = masks[field]
+            if isinstance(mask, list):
+                args.append("[" + ", ".join(f"bool(s & {m:#x})" for m in mask) + "]")
+            else:
+                args.append(f"bool(s & {mask:#x})")
+        else:
+            args.append(field)
+    targets = [t if t != "status_bits" else "s" for t in targets]
+    signature = "data, timestamp" if stamped else "data"
+    source = (
+        f"def {func.__name__}({signature}):\n"
+        f"    {', '.join(targets)} = unpack_from(data)\n"
+        f"    return T({', '.join(args)})\n"
+    )
+    namespace: Dict[str, Any] = {
+        "unpack_from": struct.Struct("<HHBB" + fmt).unpack_from,
+        "T": message_class(msgid, fields),
+    }
+    exec(compile(source, f"<generated {func.__name__}>", "exec"), namespace)
+    generated = namespace[func.__name__]
+    generated.__source__ = source
+    return generated
+
+
+decoders = {msgid: _generate(msgid, False) for msgid in _SPECS}
+"""Generated decoders, by message id, taking the bytes of a complete message."""
+
+stamped_decoders = {msgid: _generate(msgid, True) for msgid in _SPECS}
+"""As ``decoders``, also taking the receive timestamp to store in the message."""
@@ -0,0 +1,58 @@
+__all__ = ["STATUS_UPDATE_IDS", "ChangeFilter"]
+
+from typing import Dict, Iterable
+
+STATUS_UPDATE_IDS = frozenset(
+    (
+        0x0481,  # mot_get_statusupdate
+        0x0491,  # mot_get_dcstatusupdate
+        0x0661,  # pz_get_pzstatusupdate
+        0x0665,  # pz_get_ntstatusupdate
+        0x0821,  # la_get_statusupdate
+        0x0826,  # ld_get_statusupdate
+        0x0861,  # tec_get_statusupdate
+        0x0881,  # quad_get_statusupdate
+        0x08E1,  # pzmot_get_statusupdate
+    )
+)
+"""Message ids of the periodic status update messages."""
+
+# Status updates which begin with chan_ident, so are tracked per channel
+_CHANNEL_IDS = frozenset((0x0481, 0x0491, 0x0661, 0x08E1))
+
+
+class ChangeFilter:
+    """
+    Frame filter which drops status updates identical to the previous one.
+
+    For use as the ``frame_filter`` of an ``Unpacker``.
+    The data bytes of each status update are compared with those of the previous update
+    with the same message id from the same source (and channel), and the message is only
+    decoded if they differ.
+    All other messages are passed through.
+
+    :param msgids: Message ids to filter, defaults to all status update messages.
+    """
+
+    def __init__(self, msgids: Iterable[int] = STATUS_UPDATE_IDS):
+        self.msgids = frozenset(msgids)
+        self._last: Dict[bytes, bytes] = {}
+
+    def __call__(self, data: bytes) -> bool:
+        msgid = data[0] | data[1] << 8
+        if msgid not in self.msgids:
+            return True
+        # Key on the msgid and source bytes, plus chan_ident where there is one
+        if msgid in _CHANNEL_IDS:
+            key = data[0:2] + data[5:8]
+        else:
+            key = data[0:2] + data[5:6]
+        body = data[6:]
+        if self._last.get(key) == body:
+            return False
+        self._last[key] = body
+        return True
+
+    def reset(self):
+        """Forget all previous messages, so the next of each is passed through."""
+        self._last.clear()
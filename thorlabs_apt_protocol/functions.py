@@ -1,6 +1,6 @@
+from __future__ import annotations
 from typing import Optional, Sequence
 import struct
-from __future__ import annotations
 
 
 def _pack(
@@ -19,6 +19,15 @@ def _pack(
         return struct.pack("<H2b2B", msgid, param1, param2, dest, source)
 
 
+def _msgid(func) -> int:
+    # Message id of an encoding function, read from a message encoded with dummy
+    # arguments
+    import inspect
+
+    frame = func(**{p: 0 for p in inspect.signature(func).parameters})
+    return struct.unpack_from("<H", frame)[0]
+
+
 def mod_identify(dest: int, source: int, chan_ident: int) -> bytes:
     return _pack(0x0223, dest, source, param1=chan_ident)
 
@@ -0,0 +1,180 @@
+__all__ = ["STATUS_ACKS", "KeepAlive"]
+
+import math
+import time
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from . import functions
+
+STATUS_ACKS: Dict[int, Callable[..., bytes]] = {
+    0x0481: functions.mot_ack_dcstatusupdate,  # mot_get_statusupdate
+    0x0491: functions.mot_ack_dcstatusupdate,  # mot_get_dcstatusupdate
+    0x0661: functions.pz_ack_pzstatusupdate,  # pz_get_pzstatusupdate
+    0x0665: functions.pz_ack_ntstatusbits,  # pz_get_ntstatusupdate
+    0x0821: functions.la_ack_statusupdate,  # la_get_statusupdate
+    0x0826: functions.ld_ack_statusupdate,  # ld_get_statusupdate
+    0x0861: functions.tec_ack_statusupdate,  # tec_get_statusupdate
+    0x0881: functions.quad_ack_statusupdate,  # quad_get_statusupdate
+    0x08E1: functions.pzmot_ack_statusupdate,  # pzmot_get_statusupdate
+}
+"""Acknowledgement to send to keep each kind of status update message flowing."""
+
+
+class _Entry:
+    __slots__ = ("port", "dest", "msgids", "frames", "tick")
+
+    def __init__(self, port: Hashable, dest: int):
+        self.port = port
+        self.dest = dest
+        self.msgids: Tuple[int, ...] = ()
+        self.frames = b""
+        self.tick = 0
+
+
+class KeepAlive:
+    """
+    Schedule the status update acknowledgements of many controllers, on many ports.
+
+    Controllers stop sending status updates unless the host acknowledges them
+    regularly.
+    Each registered controller is acknowledged every ``interval``; the deadlines of all
+    controllers are kept in a single timer wheel (one slot per ``resolution``), so
+    finding the due acknowledgements costs nothing for controllers which are not due.
+    The acknowledgement messages of each controller are encoded once, when it is
+    registered, and those due on the same port at the same time are joined into one
+    write.
+
+    Controllers are registered explicitly with ``add()``, or from the status update
+    messages received, with ``update()``.
+    Call ``due()`` regularly (at least every ``resolution``), and write the bytes
+    returned for each port.
+
+    :param source: Address of the host.
+    :param interval: Time between acknowledgements of each controller, in seconds.
+    :param resolution: Time of each slot of the timer wheel, in seconds.
+    :param clock: Callable returning the current time, in seconds.
+    """
+
+    def __init__(
+        self,
+        source: int = 0x01,
+        interval: float = 0.5,
+        resolution: float = 0.01,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.source = source
+        self.interval = interval
+        self.resolution = resolution
+        self.clock = clock
+        self._entries: Dict[Tuple[Hashable, int], _Entry] = {}
+        # Slots cover one interval, so every deadline is less than a turn away
+        self._wheel: List[Dict[Tuple[Hashable, int], _Entry]] = [
+            {} for _ in range(math.ceil(interval / resolution) + 1)
+        ]
+        # Last tick visited by due(), None before the first call
+        self._tick: Optional[int] = None
+
+    def _to_tick(self, now: float) -> int:
+        return math.floor(now / self.resolution)
+
+    def _schedule(self, entry: _Entry, now: float):
+        key = (entry.port, entry.dest)
+        self._wheel[entry.tick % len(self._wheel)].pop(key, None)
+        entry.tick = math.ceil((now + self.interval) / self.resolution)
+        self._wheel[entry.tick % len(self._wheel)][key] = entry
+
+    def add(
+        self,
+        port: Hashable,
+        dest: int,
+        msgids: Iterable[int] = (0x0491,),
+        now: Optional[float] = None,
+    ):
+        """
+        Start acknowledging the status updates of a controller.
+
+        If the controller is already registered, the message ids are added to its own,
+        and its deadline is unchanged.
+
+        :param port: Any hashable identifying the port (such as the port object).
+        :param dest: Address of the controller.
+        :param msgids: Message ids of the status updates it sends (see ``STATUS_ACKS``).
+        """
+        key = (port, dest)
+        entry = self._entries.get(key)
+        new = False
+        if entry is None:
+            entry = self._entries[key] = _Entry(port, dest)
+            new = True
+        msgids = tuple(sorted(set(entry.msgids).union(msgids)))
+        if msgids != entry.msgids:
+            entry.msgids = msgids
+            acks = dict.fromkeys(STATUS_ACKS[msgid] for msgid in msgids)
+            entry.frames = b"".join(ack(dest, self.source) for ack in acks)
+        if new:
+            self._schedule(entry, self.clock() if now is None else now)
+
+    def update(self, port: Hashable, msg, now: Optional[float] = None):
+        """
+        Register the sender of a received message, if it is a status update.
+
+        :param port: The port the message was received on.
+        :param msg: Decoded message.
+        """
+        if msg.msgid in STATUS_ACKS:
+            entry = self._entries.get((port, msg.source))
+            if entry is None or msg.msgid not in entry.msgids:
+                self.add(port, msg.source, (msg.msgid,), now)
+
+    def touch(self, port: Hashable, dest: int, now: Optional[float] = None):
+        """
+        Postpone the next acknowledgement of a controller, after one was sent otherwise.
+        """
+        entry = self._entries.get((port, dest))
+        if entry is not None:
+            self._schedule(entry, self.clock() if now is None else now)
+
+    def remove(self, port: Hashable, dest: int):
+        """Stop acknowledging a controller (such as after ``hw_stop_updatemsgs``)."""
+        entry = self._entries.pop((port, dest), None)
+        if entry is not None:
+            self._wheel[entry.tick % len(self._wheel)].pop((port, dest), None)
+
+    def deadline(self, port: Hashable, dest: int) -> Optional[float]:
+        """Time of the next acknowledgement of a controller, or None if not registered."""
+        entry = self._entries.get((port, dest))
+        return None if entry is None else entry.tick * self.resolution
+
+    def due(self, now: Optional[float] = None) -> Dict[Hashable, bytes]:
+        """
+        The acknowledgements due now, joined per port.
+
+        The controllers acknowledged are scheduled again, ``interval`` from now.
+
+        :returns: Bytes to write, by port.
+        """
+        if now is None:
+            now = self.clock()
+        current = self._to_tick(now)
+        wheel = self._wheel
+        fired: List[_Entry] = []
+        # Visit each slot passed since the last call, at most one turn of the wheel
+        first = current - len(wheel) + 1
+        if self._tick is not None:
+            first = max(first, self._tick + 1)
+        for tick in range(first, current + 1):
+            slot = wheel[tick % len(wheel)]
+            if slot:
+                fired.extend(e for e in slot.values() if e.tick <= current)
+        self._tick = current if self._tick is None else max(self._tick, current)
+        out: Dict[Hashable, List[bytes]] = {}
+        for entry in fired:
+            frames = out.get(entry.port)
+            if frames is None:
+                frames = out[entry.port] = []
+            frames.append(entry.frames)
+            self._schedule(entry, now)
+        return {port: b"".join(frames) for port, frames in out.items()}
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,106 @@
+"""
+Generated classes of decoded messages.
+
+Every message is an instance of a class generated for its message id and fields.
+The classes are namedtuples of the fields which vary between messages (``dest``,
+``source`` and the data fields), with ``__slots__ = ()`` so instances have no
+``__dict__``; the message name ``msg`` and ``msgid`` are class attributes, shared
+rather than stored in every message.
+``_asdict()`` still includes ``msg`` and ``msgid``, and messages of different types
+never compare equal.
+
+The classes of the usual layout of every message are generated at import, in
+``MESSAGE_CLASSES``, with the types of their fields in ``__annotations__``.
+"""
+
+__all__ = ["MESSAGE_CLASSES", "message_class"]
+
+from collections import namedtuple
+import functools
+from typing import Any, Dict, Tuple
+
+from .parsing import id_to_func
+
+# Types of the fields of each message, found by parsing an empty message
+_FIELD_TYPES: Dict[int, Dict[str, type]] = {}
+
+
+def _rebuild(msgid: int, fields: Tuple[str, ...], values: tuple):
+    return message_class(msgid, fields)(*values)
+
+
+@functools.lru_cache(maxsize=None)
+def message_class(msgid: int, fields: Tuple[str, ...]) -> type:
+    """
+    The class of decoded messages with the given id and fields.
+
+    :param msgid: Message id.
+    :param fields: Names of the fields stored in each message (all except ``msg`` and
+        ``msgid``).
+    """
+    msg = id_to_func[msgid].__name__
+    base = namedtuple(msg, fields)  # type: ignore[misc]
+    types = _FIELD_TYPES.get(msgid, {})
+
+    def _asdict(self) -> Dict[str, Any]:
+        out = {"msg": msg, "msgid": msgid}
+        out.update(zip(fields, self))
+        return out
+
+    def __eq__(self, other):
+        if not isinstance(other, tuple):
+            return NotImplemented
+        return (
+            getattr(other, "msgid", None) == msgid
+            and getattr(other, "_fields", None) == fields
+            and tuple.__eq__(self, other)
+        )
+
+    def __ne__(self, other):
+        equal = __eq__(self, other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        return hash((msgid, tuple(self)))
+
+    def __reduce__(self):
+        return _rebuild, (msgid, fields, tuple(self))
+
+    return type(
+        msg,
+        (base,),
+        {
+            "__slots__": (),
+            "__module__": __name__,
+            "__annotations__": {name: types.get(name, Any) for name in fields},
+            "msg": msg,
+            "msgid": msgid,
+            "_asdict": _asdict,
+            "__eq__": __eq__,
+            "__ne__": __ne__,
+            "__hash__": __hash__,
+            "__reduce__": __reduce__,
+        },
+    )
+
+
+def _default_class(msgid: int):
+    # Parse an empty long form message, with data long enough for any parser
+    empty = bytes((msgid & 0xFF, msgid >> 8, 255, 0, 0x81, 0)) + bytes(255)
+    try:
+        fields = id_to_func[msgid](empty)
+    except Exception:
+        return None
+    types: Dict[str, type] = {"dest": int, "source": int}
+    types.update((name, type(value)) for name, value in list(fields.items())[4:])
+    _FIELD_TYPES[msgid] = types
+    return message_class(msgid, tuple(fields)[2:])
+
+
+MESSAGE_CLASSES: Dict[int, type] = {}
+"""Class of the usual layout of each message, by message id."""
+
+for _msgid in id_to_func:
+    _class = _default_class(_msgid)
+    if _class is not None:
+        MESSAGE_CLASSES[_msgid] = _class
@@ -0,0 +1,39 @@
+"""Pacing of writes to the throughput of a serial link."""
+
+__all__ = ["LinkPacer"]
+
+from typing import Optional
+
+
+class LinkPacer:
+    """
+    Track when a serial link has finished sending the bytes written to it.
+
+    A serial link carries ten bits per byte (8N1 framing: a start bit, eight data bits
+    and a stop bit), so ``baudrate / 10`` bytes per second.
+    ``free`` is the time at which the bytes written so far will all have been sent.
+
+    :param baudrate: Speed of the link, in bits per second; None if it is not paced,
+        and sending takes no time.
+    """
+
+    def __init__(self, baudrate: Optional[float] = 115200):
+        self.bytes_per_second = None if baudrate is None else baudrate / 10
+        self.free = 0.0
+
+    def send(self, size: int, now: float) -> float:
+        """
+        Account for writing bytes now.
+
+        :param size: Number of bytes written.
+        :param now: Current time, in seconds.
+        :returns: Time at which they will have been sent.
+        """
+        if self.bytes_per_second is None:
+            return now
+        self.free = max(self.free, now) + size / self.bytes_per_second
+        return self.free
+
+    def ready(self, now: float, lookahead: float = 0.0) -> bool:
+        """Whether no more than ``lookahead`` seconds of bytes are waiting to be sent."""
+        return self.free <= now + lookahead
@@ -1,6 +1,6 @@
 import struct
 import functools
-from typing import Dict, Any
+from typing import Any, Callable, Dict, Tuple
 
 id_to_func = {}
 HEADER_SIZE = 6
@@ -79,8 +79,8 @@ def _parse_status_bits(status_bits: int) -> Dict[str, Any]:
         "dig_ins": [
             bool(status_bits & 0x100000),
             bool(status_bits & 0x200000),
-            bool(status_bits & 0x300000),
             bool(status_bits & 0x400000),
+            bool(status_bits & 0x800000),
         ],
         "motor_current_limit_reached": bool(status_bits & 0x1000000),
         "encoder_fault": bool(status_bits & 0x2000000),
@@ -133,9 +133,13 @@ def _parse_la_status_bits(status_bits: int) -> Dict[str, Any]:
     # Bitfield
     # Note, the adc on the kls101 is ignored for now
     # KFS 2021-02-19
-    units = "mA" if bool(status_bits & 0x10) else ""
-    units = "mW" if bool(status_bits & 0x20) else ""
-    units = "dBm" if bool(status_bits & 0x40) else ""
+    units = ""
+    if status_bits & 0x10:
+        units = "mA"
+    elif status_bits & 0x20:
+        units = "mW"
+    elif status_bits & 0x40:
+        units = "dBm"
     return {
         "output_enabled": bool(status_bits & 0x1),
         "keyswitch_enabled": bool(status_bits & 0x2),
@@ -149,10 +153,15 @@ def _parse_la_status_bits(status_bits: int) -> Dict[str, Any]:
 
 def _parse_ld_status_bits(status_bits: int) -> Dict[str, Any]:
     # Bitfield
-    tia_range = "9uA" if bool(status_bits & 0x10) else ""
-    tia_range = "100uA" if bool(status_bits & 0x20) else ""
-    tia_range = "0.9mA" if bool(status_bits & 0x40) else ""
-    tia_range = "10mA" if bool(status_bits & 0x80) else ""
+    tia_range = ""
+    if status_bits & 0x10:
+        tia_range = "9uA"
+    elif status_bits & 0x20:
+        tia_range = "100uA"
+    elif status_bits & 0x40:
+        tia_range = "0.9mA"
+    elif status_bits & 0x80:
+        tia_range = "10mA"
     return {
         "output_enabled": bool(status_bits & 0x1),
         "keyswitch_enabled": bool(status_bits & 0x2),
@@ -183,10 +192,15 @@ def _parse_quad_status_bits(status_bits: int) -> Dict[str, Any]:
 
 def _parse_tec_status_bits(status_bits: int) -> Dict[str, Any]:
     # Bitfield
-    display_mode = "temp_actual" if bool(status_bits & 0x10) else ""
-    display_mode = "temp_set" if bool(status_bits & 0x20) else ""
-    display_mode = "temp_delta" if bool(status_bits & 0x40) else ""
-    display_mode = "current" if bool(status_bits & 0x80) else ""
+    display_mode = ""
+    if status_bits & 0x10:
+        display_mode = "temp_actual"
+    elif status_bits & 0x20:
+        display_mode = "temp_set"
+    elif status_bits & 0x40:
+        display_mode = "temp_delta"
+    elif status_bits & 0x80:
+        display_mode = "current"
     return {
         "output_enabled": bool(status_bits & 0x1),
         "display_mode": display_mode,
@@ -215,6 +229,67 @@ def _parse_pzmot_status_bits(status_bits: int) -> Dict[str, Any]:
     }
 
 
+def _status_bit_names(parse_bits: Callable[[int], Dict[str, Any]]) -> Dict[str, int]:
+    # Mask of each status bit, found by parsing one bit at a time.
+    # List fields (dig_ins) are named one item at a time (dig_in1, dig_in2, ...) and
+    # string fields by name and value (such as units_mA).
+    zero = parse_bits(0)
+    names: Dict[str, int] = {}
+    for i in range(32):
+        bit = 1 << i
+        for name, value in parse_bits(bit).items():
+            if isinstance(value, list):
+                keys = [
+                    f"{name[:-1]}{j + 1}"
+                    for j, (item, clear) in enumerate(zip(value, zero[name]))
+                    if item != clear
+                ]
+            elif value == zero[name]:
+                keys = []
+            elif isinstance(value, str):
+                keys = [f"{name}_{value}"]
+            else:
+                keys = [name]
+            for key in keys:
+                names[key] = names.get(key, 0) | bit
+    return names
+
+
+# Individual status bits of each bitfield layout above, by name, derived from the
+# parsers so that both always agree.
+STATUS_BITS: Dict[str, Dict[str, int]] = {
+    layout: _status_bit_names(parse_bits)
+    for layout, parse_bits in (
+        ("mot", _parse_status_bits),
+        ("pz", _parse_pz_status_bits),
+        ("nt", _parse_nt_status_bits),
+        ("la", _parse_la_status_bits),
+        ("ld", _parse_ld_status_bits),
+        ("quad", _parse_quad_status_bits),
+        ("tec", _parse_tec_status_bits),
+        ("pzmot", _parse_pzmot_status_bits),
+    )
+}
+
+# Messages carrying a status bitfield: layout, offset of the bitfield from the start of
+# the message, and whether the data begins with chan_ident
+STATUS_MESSAGES: Dict[int, Tuple[str, int, bool]] = {
+    0x042A: ("mot", HEADER_SIZE + 2, True),  # mot_get_statusbits
+    0x0464: ("mot", HEADER_SIZE + 10, True),  # mot_move_completed (long form)
+    0x0466: ("mot", HEADER_SIZE + 10, True),  # mot_move_stopped (long form)
+    0x0481: ("mot", HEADER_SIZE + 10, True),  # mot_get_statusupdate
+    0x0491: ("mot", HEADER_SIZE + 10, True),  # mot_get_dcstatusupdate
+    0x065C: ("pz", HEADER_SIZE + 2, True),  # pz_get_pzstatusbits
+    0x0661: ("pz", HEADER_SIZE + 6, True),  # pz_get_pzstatusupdate
+    0x063F: ("nt", HEADER_SIZE, False),  # pz_get_ntstatusbits
+    0x0821: ("la", HEADER_SIZE + 4, False),  # la_get_statusupdate
+    0x0826: ("ld", HEADER_SIZE + 10, False),  # ld_get_statusupdate
+    0x0881: ("quad", HEADER_SIZE + 10, False),  # quad_get_statusupdate
+    0x0861: ("tec", HEADER_SIZE + 6, False),  # tec_get_statusupdate
+    0x08E1: ("pzmot", HEADER_SIZE + 10, True),  # pzmot_get_statusupdate
+}
+
+
 @parser(0x0212)
 def mod_get_chanenablestate(data: bytes) -> Dict[str, Any]:
     return {"chan_ident": data[2], "enabled": data[3] == 0x01}
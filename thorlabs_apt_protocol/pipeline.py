@@ -0,0 +1,74 @@
+__all__ = ["AXIS_PARAMETERS", "read_parameters"]
+
+import collections
+from typing import Any, Callable, Counter, Dict, Iterable, Sequence, Tuple
+
+from . import functions
+
+AXIS_PARAMETERS = (
+    functions.mot_req_velparams,
+    functions.mot_req_jogparams,
+    functions.mot_req_homeparams,
+    functions.mot_req_limswitchparams,
+    functions.mot_req_powerparams,
+    functions.mot_req_dcpidparams,
+    functions.mot_req_genmoveparams,
+    functions.mot_req_moverelparams,
+    functions.mot_req_moveabsparams,
+    functions.mot_req_bowindex,
+)
+"""Requests for the parameter blocks of a motor axis, as used by ``read_parameters``."""
+
+
+def read_parameters(
+    correlator,
+    unpacker,
+    axes: Iterable[Tuple[int, int]],
+    requests: Sequence[Callable[..., bytes]] = AXIS_PARAMETERS,
+    window: int = 4,
+) -> Dict[Tuple[int, int], Dict[str, Any]]:
+    """
+    Read parameter blocks of many axes, keeping several requests in flight per controller.
+
+    Up to ``window`` requests are outstanding for each controller address at once, so the
+    serial round trip is paid once per window rather than once per parameter block.
+    Responses are matched by ``correlator`` and may arrive in any order.
+
+    :param correlator: ``Correlator`` used to send the requests.
+    :param unpacker: ``Unpacker`` reading from the same port.
+    :param axes: ``(dest, chan_ident)`` pairs to read.
+    :param requests: Request functions to send for each axis.
+    :param window: Maximum number of outstanding requests per controller.
+    :returns: For each ``(dest, chan_ident)``, a dict of the response messages keyed by name.
+    :raises TimeoutError: If any request is not answered within the correlator timeout.
+    """
+    queues: Dict[int, collections.deque] = collections.defaultdict(collections.deque)
+    results: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    for dest, chan_ident in axes:
+        results[(dest, chan_ident)] = {}
+        for func in requests:
+            queues[dest].append((func, chan_ident))
+    in_flight: Counter[int] = collections.Counter()
+    completed: collections.deque = collections.deque()
+
+    def send(dest):
+        func, chan_ident = queues[dest].popleft()
+        future = correlator.request(func, dest=dest, chan_ident=chan_ident)
+        future.add_done_callback(lambda f: completed.append((dest, chan_ident, f)))
+        in_flight[dest] += 1
+
+    while any(queues.values()) or any(in_flight.values()):
+        for dest, queue in queues.items():
+            while queue and in_flight[dest] < window:
+                send(dest)
+        for msg in unpacker:
+            correlator.dispatch(msg)
+            if completed:
+                break
+        correlator.expire()
+        while completed:
+            dest, chan_ident, future = completed.popleft()
+            in_flight[dest] -= 1
+            msg = future.result()
+            results[(dest, chan_ident)][msg.msg] = msg
+    return results
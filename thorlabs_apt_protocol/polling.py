@@ -0,0 +1,258 @@
+__all__ = ["PollRate", "PollScheduler"]
+
+from collections import namedtuple
+import functools
+import heapq
+import struct
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .correlation import REQUEST_RESPONSE
+from .pacing import LinkPacer
+from .parsing import HEADER_SIZE, id_to_func
+from .unpacker import MAX_DATA_LENGTH
+
+PollRate = namedtuple(
+    "PollRate",
+    ["dest", "msg", "param", "requested", "allocated", "sent", "received"],
+)
+PollRate.__doc__ = (
+    "Rates of one poll, in polls per second: requested, allocated within the link "
+    "capacity, and achieved (requests sent and responses received)."
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _response_length(msgid: int, param: int) -> int:
+    # Smallest message the parser of the response accepts, with the request parameter
+    # (channel or sub-message id) as its first field
+    parse = id_to_func[msgid]
+    for length in range(2, MAX_DATA_LENGTH + 1):
+        data = struct.pack("<HHBBH", msgid, length, 0x81, 0, param) + bytes(length - 2)
+        try:
+            parse(data)
+        except (struct.error, IndexError, KeyError):
+            continue
+        return HEADER_SIZE + length
+    raise ValueError(f"Can not find the length of message {msgid:#06x}")
+
+
+def _key(request: bytes) -> Tuple[int, int, int]:
+    # Address, response message id and parameter (channel or sub-message id)
+    msgid, _, dest = struct.unpack_from("<HHB", request)
+    response = REQUEST_RESPONSE.get(msgid)
+    if response is None:
+        raise ValueError(f"Message {msgid:#06x} is not a request")
+    if dest & 0x80:
+        (param,) = struct.unpack_from("<H", request, HEADER_SIZE)
+    else:
+        param = request[2]
+    return dest & 0x7F, response, param
+
+
+class _Poll:
+    __slots__ = (
+        "request",
+        "key",
+        "cost",
+        "requested",
+        "allocated",
+        "next",
+        "start",
+        "sent",
+        "received",
+    )
+
+    def __init__(self, request: bytes, key: Tuple[int, int, int], cost: int):
+        self.request = request
+        self.key = key
+        self.cost = cost
+        self.requested = 0.0
+        self.allocated = 0.0
+        self.next = 0.0
+        self.start = 0.0
+        self.sent = 0
+        self.received = 0
+
+
+class PollScheduler:
+    """
+    Poll many controllers and channels at target rates, within the capacity of the link.
+
+    For controllers which are polled (with requests such as ``mot_req_dcstatusupdate``,
+    ``mot_req_statusupdate``, ``quad_req_readings`` or ``tec_req_readings``) rather than
+    sending update messages.
+    Each poll is an encoded request and a requested rate; the size of its response is
+    found from the parser of the response message.
+    The link carries ``baudrate / 10`` bytes per second in each direction (see
+    ``LinkPacer``), of which ``utilization`` is given to polls.
+    If the polls requested do not fit, the capacity is shared fairly: polls asking for
+    less than an equal share get their rate, the others an equal share of the rest.
+
+    Polls are interleaved in order of their due times, and paced so that no more than
+    ``lookahead`` seconds of traffic are queued on the link.
+    Call ``due()`` at least every ``lookahead`` (``next_due()`` tells when), and write
+    the bytes returned.
+    Give received messages to ``update()`` to count responses.
+
+    :param baudrate: Speed of the link, in bits per second.
+    :param utilization: Fraction of the link capacity to use for polls.
+    :param lookahead: Time of traffic which may be queued on the link, in seconds.
+    :param clock: Callable returning the current time, in seconds.
+    """
+
+    def __init__(
+        self,
+        baudrate: float = 115200,
+        utilization: float = 0.9,
+        lookahead: float = 0.01,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.link = LinkPacer(baudrate)
+        self.utilization = utilization
+        self.lookahead = lookahead
+        self.clock = clock
+        self._polls: Dict[Tuple[int, int, int], _Poll] = {}
+        # Polls by address and response message id
+        self._by_response: Dict[Tuple[int, int], List[_Poll]] = {}
+        self._heap: List[Tuple[float, int, _Poll]] = []
+        self._count = 0
+
+    def add(
+        self,
+        request: bytes,
+        rate: float,
+        response_length: Optional[int] = None,
+        now: Optional[float] = None,
+    ):
+        """
+        Poll with a request at a rate, or change the rate of an existing poll.
+
+        :param request: Encoded request, such as ``mot_req_dcstatusupdate(0x50, 1, 1)``.
+        :param rate: Requested rate, in polls per second.
+        :param response_length: Size of the response, including its header, if it is
+            not the size of the usual response.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if now is None:
+            now = self.clock()
+        key = _key(request)
+        poll = self._polls.get(key)
+        if poll is None:
+            if response_length is None:
+                response_length = _response_length(key[1], key[2])
+            poll = self._polls[key] = _Poll(
+                request, key, max(len(request), response_length)
+            )
+            poll.next = poll.start = now
+            self._by_response.setdefault(key[:2], []).append(poll)
+            self._push(poll)
+        poll.requested = rate
+        self._allocate()
+
+    def remove(self, request: bytes):
+        """Stop polling with a request."""
+        key = _key(request)
+        poll = self._polls.pop(key, None)
+        if poll is not None:
+            polls = self._by_response[key[:2]]
+            polls.remove(poll)
+            if not polls:
+                del self._by_response[key[:2]]
+            self._allocate()
+
+    def _push(self, poll: _Poll):
+        self._count += 1
+        heapq.heappush(self._heap, (poll.next, self._count, poll))
+
+    def _allocate(self):
+        # Max-min fair share of the link: the smallest requests are met first, and
+        # the polls which ask for more than the remaining share are limited to it
+        capacity = self.link.bytes_per_second * self.utilization
+        polls = sorted(self._polls.values(), key=lambda p: p.requested)
+        weight = sum(p.cost for p in polls)
+        for poll in polls:
+            level = capacity / weight
+            poll.allocated = min(poll.requested, level)
+            capacity -= poll.allocated * poll.cost
+            weight -= poll.cost
+
+    def due(self, now: Optional[float] = None) -> bytes:
+        """
+        The requests to write now.
+
+        :returns: Bytes to write (empty if no request is due).
+        """
+        if now is None:
+            now = self.clock()
+        heap = self._heap
+        out = []
+        while heap and heap[0][0] <= now and self.link.ready(now, self.lookahead):
+            _, _, poll = heapq.heappop(heap)
+            if self._polls.get(poll.key) is not poll:
+                continue  # removed
+            out.append(poll.request)
+            poll.sent += 1
+            self.link.send(poll.cost, now)
+            # Keep to the schedule, but when late start a new period from now rather
+            # than catching up with a burst
+            poll.next += 1 / poll.allocated
+            if poll.next <= now:
+                poll.next = now + 1 / poll.allocated
+            self._push(poll)
+        return b"".join(out)
+
+    def next_due(self) -> Optional[float]:
+        """Time ``due()`` should next be called, or None if there are no polls."""
+        if not self._polls:
+            return None
+        return max(self._heap[0][0], self.link.free - self.lookahead)
+
+    def update(self, msg):
+        """
+        Count a received message, if it is the response to a poll.
+
+        :param msg: Decoded message.
+        """
+        param = getattr(msg, "chan_ident", None)
+        if param is None:
+            param = getattr(msg, "submsgid", None)
+        if param is None:
+            # The response does not tell which poll it answers: count it for the poll
+            # of the same message with the most responses outstanding
+            polls = self._by_response.get((msg.source, msg.msgid))
+            if not polls:
+                return
+            poll = max(polls, key=lambda p: p.sent - p.received)
+        else:
+            poll = self._polls.get((msg.source, msg.msgid, param))
+            if poll is None:
+                return
+        poll.received += 1
+
+    def rates(self, now: Optional[float] = None) -> List[PollRate]:
+        """
+        Requested, allocated and achieved rate of every poll, since it was added.
+        """
+        if now is None:
+            now = self.clock()
+        out = []
+        for poll in self._polls.values():
+            elapsed = now - poll.start
+            dest, response, param = poll.key
+            out.append(
+                PollRate(
+                    dest,
+                    id_to_func[response].__name__,
+                    param,
+                    poll.requested,
+                    poll.allocated,
+                    poll.sent / elapsed if elapsed > 0 else 0.0,
+                    poll.received / elapsed if elapsed > 0 else 0.0,
+                )
+            )
+        return out
+
+    def __len__(self) -> int:
+        return len(self._polls)
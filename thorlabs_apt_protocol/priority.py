@@ -0,0 +1,169 @@
+__all__ = [
+    "SAFETY",
+    "MOTION",
+    "BULK",
+    "LANES",
+    "SAFETY_IDS",
+    "MOTION_IDS",
+    "LaneStats",
+    "CommandQueue",
+]
+
+from collections import deque, namedtuple
+import struct
+import time
+from typing import Callable, Deque, List, Optional, Tuple
+
+from . import functions
+from .pacing import LinkPacer
+
+SAFETY, MOTION, BULK = 0, 1, 2
+LANES = ("safety", "motion", "bulk")
+"""Names of the lanes of ``CommandQueue``, highest priority first."""
+
+
+def _msgids(*names: str) -> frozenset:
+    return frozenset(functions._msgid(getattr(functions, name)) for name in names)
+
+
+SAFETY_IDS = _msgids(
+    "mot_move_stop",
+    "pz_set_zero",
+    "pz_stop_lutoutput",
+    "la_disableoutput",
+    "kna_stop_xyscan",
+)
+"""Message ids sent in the safety lane by default."""
+
+MOTION_IDS = _msgids(
+    "mot_move_home",
+    "mot_move_relative",
+    "mot_move_absolute",
+    "mot_move_jog",
+    "mot_move_velocity",
+    "mot_move_synchstart",
+    "pz_set_outputvolts",
+    "pz_set_outputpos",
+    "pz_move_ntcirctohomepos",
+    "quad_set_positionoutputs",
+    "pzmot_move_absolute",
+    "pzmot_move_jog",
+)
+"""Message ids sent in the motion lane by default; all others go in the bulk lane."""
+
+LaneStats = namedtuple("LaneStats", ["lane", "queued", "sent", "mean", "max"])
+LaneStats.__doc__ = (
+    "Messages waiting and sent in one lane, and the mean and maximum latency of those "
+    "sent (from ``put()`` until the end of their transmission), in seconds."
+)
+
+
+class CommandQueue:
+    """
+    Send outgoing messages by priority, so that a stop is never stuck behind uploads.
+
+    Messages are queued in one of three lanes: ``SAFETY`` (stops and disabling
+    outputs, see ``SAFETY_IDS``), ``MOTION`` (moves and output setpoints, see
+    ``MOTION_IDS``) and ``BULK`` (everything else, such as parameters and trajectory
+    arrays).
+    ``due()`` releases messages one at a time, highest lane first, paced to the
+    throughput of the link (see ``LinkPacer``) with no more than ``lookahead`` seconds
+    of traffic queued on the port.
+    A safety message therefore preempts queued bulk traffic at the next message
+    boundary: its latency is at most ``lookahead``, plus the time to send the longest
+    message already released, plus its own.
+
+    Call ``due()`` whenever messages are put and at least every ``lookahead``
+    (``next_due()`` tells when), and write the bytes returned.
+    ``stats()`` reports the latency of each lane.
+
+    :param baudrate: Speed of the link, in bits per second; None to not pace messages.
+    :param lookahead: Time of traffic which may be queued on the port, in seconds.
+    :param clock: Callable returning the current time, in seconds.
+    """
+
+    def __init__(
+        self,
+        baudrate: Optional[float] = 115200,
+        lookahead: float = 0.005,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.link = LinkPacer(baudrate)
+        self.lookahead = lookahead
+        self.clock = clock
+        self._lanes: Tuple[Deque[Tuple[float, bytes]], ...] = tuple(
+            deque() for _ in LANES
+        )
+        self._sent = [0] * len(LANES)
+        self._total = [0.0] * len(LANES)
+        self._max = [0.0] * len(LANES)
+
+    def put(self, data: bytes, lane: Optional[int] = None, now: Optional[float] = None):
+        """
+        Queue a message.
+
+        :param data: Encoded message.
+        :param lane: ``SAFETY``, ``MOTION`` or ``BULK``, by default from its message id.
+        """
+        if now is None:
+            now = self.clock()
+        if lane is None:
+            (msgid,) = struct.unpack_from("<H", data)
+            if msgid in SAFETY_IDS:
+                lane = SAFETY
+            elif msgid in MOTION_IDS:
+                lane = MOTION
+            else:
+                lane = BULK
+        self._lanes[lane].append((now, data))
+
+    def due(self, now: Optional[float] = None) -> bytes:
+        """
+        The messages to write now, highest priority first.
+
+        :returns: Bytes to write (empty if the link is busy or nothing is queued).
+        """
+        if now is None:
+            now = self.clock()
+        out = []
+        while self.link.ready(now, self.lookahead):
+            for lane, queue in enumerate(self._lanes):
+                if queue:
+                    break
+            else:
+                break
+            queued, data = queue.popleft()
+            out.append(data)
+            latency = self.link.send(len(data), now) - queued
+            self._sent[lane] += 1
+            self._total[lane] += latency
+            self._max[lane] = max(self._max[lane], latency)
+        return b"".join(out)
+
+    def next_due(self) -> Optional[float]:
+        """Time ``due()`` should next be called, or None if nothing is queued."""
+        if not any(self._lanes):
+            return None
+        return self.link.free - self.lookahead
+
+    def stats(self) -> List[LaneStats]:
+        """Number of messages and latency of each lane, since creation or ``reset()``."""
+        return [
+            LaneStats(
+                name,
+                len(self._lanes[lane]),
+                self._sent[lane],
+                self._total[lane] / self._sent[lane] if self._sent[lane] else 0.0,
+                self._max[lane],
+            )
+            for lane, name in enumerate(LANES)
+        ]
+
+    def reset(self):
+        """Reset the latency statistics."""
+        self._sent = [0] * len(LANES)
+        self._total = [0.0] * len(LANES)
+        self._max = [0.0] * len(LANES)
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self._lanes)
@@ -0,0 +1,107 @@
+"""
+Opt-in timing of the message parsers.
+
+While enabled, every parser registered in ``parsing.id_to_func`` (and every generated
+decoder in ``fastpath``) is replaced by a wrapper timing each call with
+``time.perf_counter_ns``, so all decoding (including by any ``Unpacker``) is measured.
+Disabling puts the original parsers back, so there is no cost when not profiling.
+"""
+
+__all__ = ["enable", "disable", "is_enabled", "reset", "stats"]
+
+import bisect
+import functools
+import time
+from typing import Any, Dict, List
+
+from .fastpath import decoders, stamped_decoders
+from .parsing import id_to_func
+
+_REGISTRIES = (id_to_func, decoders, stamped_decoders)
+
+# Histogram bucket upper bounds, in ns: eight per power of two, up to about 1 s
+_BOUNDS = [int(2 ** (i / 8)) for i in range(8 * 30)]
+
+_originals: Dict[int, Dict[int, Any]] = {}
+_counts: Dict[int, int] = {}
+_totals: Dict[int, int] = {}
+_histograms: Dict[int, List[int]] = {}
+
+
+def _timed(msgid, func):
+    histogram = _histograms.setdefault(msgid, [0] * (len(_BOUNDS) + 1))
+    clock = time.perf_counter_ns
+
+    @functools.wraps(func)
+    def inner(*args):
+        start = clock()
+        ret = func(*args)
+        elapsed = clock() - start
+        _counts[msgid] = _counts.get(msgid, 0) + 1
+        _totals[msgid] = _totals.get(msgid, 0) + elapsed
+        histogram[bisect.bisect_left(_BOUNDS, elapsed)] += 1
+        return ret
+
+    return inner
+
+
+def enable():
+    """Start timing every parser."""
+    if _originals:
+        return
+    for registry in _REGISTRIES:
+        _originals[id(registry)] = dict(registry)
+        for msgid, func in registry.items():
+            registry[msgid] = _timed(msgid, func)
+
+
+def disable():
+    """Stop timing, restoring the original parsers. Collected statistics are kept."""
+    for registry in _REGISTRIES:
+        registry.update(_originals.get(id(registry), {}))
+    _originals.clear()
+
+
+def is_enabled() -> bool:
+    return bool(_originals)
+
+
+def reset():
+    """Discard all collected statistics."""
+    _counts.clear()
+    _totals.clear()
+    for histogram in _histograms.values():
+        histogram[:] = [0] * len(histogram)
+
+
+def _percentile(histogram: List[int], count: int, fraction: float) -> int:
+    target = fraction * count
+    seen = 0
+    for i, n in enumerate(histogram):
+        seen += n
+        if seen >= target:
+            return _BOUNDS[i] if i < len(_BOUNDS) else _BOUNDS[-1]
+    return _BOUNDS[-1]
+
+
+def stats() -> Dict[int, Dict[str, Any]]:
+    """
+    Statistics of the time spent in each parser.
+
+    Percentiles are upper bounds of histogram buckets, within 10% of the true value.
+
+    :returns: For each message id decoded, a dictionary of ``msg`` (name), ``count``,
+        ``total_ns``, ``mean_ns``, ``p50_ns`` and ``p99_ns``.
+    """
+    out = {}
+    for msgid, count in _counts.items():
+        histogram = _histograms[msgid]
+        out[msgid] = {
+            "msg": id_to_func[msgid].__name__,
+            "count": count,
+            "total_ns": _totals[msgid],
+            "mean_ns": _totals[msgid] / count,
+            "p50_ns": _percentile(histogram, count, 0.5),
+            "p99_ns": _percentile(histogram, count, 0.99),
+        }
+    return out
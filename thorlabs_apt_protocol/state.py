@@ -0,0 +1,150 @@
+__all__ = ["DeviceState", "DeviceStateCache"]
+
+import time
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from .aggregate import _time
+
+_HEADER_FIELDS = ("msg", "msgid", "dest", "source", "chan_ident")
+
+
+class DeviceState:
+    """
+    Latest known state of one channel of one controller.
+
+    ``values`` holds the latest value of every field seen, regardless of the message it
+    came in, while ``blocks`` holds the fields of each message separately (useful where
+    field names are shared, such as ``acceleration`` in velocity and jog parameters).
+    Both are updated in place.
+
+    ``generation`` counts the updates applied to this state and ``timestamp`` is the time
+    of the latest one.
+    ``block_generation`` and ``block_timestamp`` record the same per message name.
+    """
+
+    __slots__ = (
+        "source",
+        "chan_ident",
+        "values",
+        "blocks",
+        "generation",
+        "timestamp",
+        "block_generation",
+        "block_timestamp",
+    )
+
+    def __init__(self, source: int, chan_ident: Optional[int]):
+        self.source = source
+        self.chan_ident = chan_ident
+        self.values: Dict[str, Any] = {}
+        self.blocks: Dict[str, Dict[str, Any]] = {}
+        self.generation = 0
+        self.timestamp: Optional[float] = None
+        self.block_generation: Dict[str, int] = {}
+        self.block_timestamp: Dict[str, float] = {}
+
+    def __getitem__(self, field: str) -> Any:
+        return self.values[field]
+
+    def __contains__(self, field: str) -> bool:
+        return field in self.values
+
+    def get(self, field: str, default: Any = None) -> Any:
+        return self.values.get(field, default)
+
+    def age(self, now: float) -> float:
+        """Time since the latest update, in seconds."""
+        if self.timestamp is None:
+            return float("inf")
+        return now - self.timestamp
+
+    def __repr__(self):
+        return (
+            f"DeviceState(source={self.source:#04x}, chan_ident={self.chan_ident}, "
+            f"generation={self.generation}, values={self.values!r})"
+        )
+
+
+class DeviceStateCache:
+    """
+    Keep the latest state of every controller channel seen in a decoded message stream.
+
+    Give every decoded message to ``update()`` (or iterate an ``Unpacker`` with
+    ``consume()``).
+    Updates are timestamped with the current time of ``clock`` or, if ``clock`` is None,
+    with the receive ``timestamp`` of each message (see the ``clock`` of ``Unpacker``),
+    in seconds.
+    State is kept per ``(source, chan_ident)``; messages with no ``chan_ident``
+    (such as ``hw_get_info``) are kept under ``(source, None)``.
+
+    :param clock: Callable returning the current time in seconds, or None to use the
+        receive ``timestamp`` of each message.
+    """
+
+    def __init__(self, clock: Optional[Callable[[], float]] = time.monotonic):
+        self.clock = clock
+        self._states: Dict[Tuple[int, Optional[int]], DeviceState] = {}
+
+    def update(self, msg) -> DeviceState:
+        """
+        Apply the fields of a decoded message to the state of its channel.
+
+        :param msg: A decoded message.
+        :returns: The updated state.
+        """
+        fields = msg._asdict()
+        chan_ident = fields.get("chan_ident")
+        key = (msg.source, chan_ident)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = DeviceState(msg.source, chan_ident)
+        for name in _HEADER_FIELDS:
+            fields.pop(name, None)
+        fields.pop("timestamp", None)
+        now = _time(msg, self.clock)
+        block = state.blocks.get(msg.msg)
+        if block is None:
+            state.blocks[msg.msg] = block = {}
+        block.update(fields)
+        state.values.update(fields)
+        state.generation += 1
+        state.timestamp = now
+        state.block_generation[msg.msg] = state.generation
+        state.block_timestamp[msg.msg] = now
+        return state
+
+    def consume(self, unpacker):
+        """
+        Update the cache with every message from ``unpacker``, yielding each message.
+
+        :param unpacker: ``Unpacker`` (or any iterable of decoded messages).
+        """
+        for msg in unpacker:
+            self.update(msg)
+            yield msg
+
+    def get(
+        self, source: int, chan_ident: Optional[int] = None
+    ) -> Optional[DeviceState]:
+        """
+        The state of a channel, or None if nothing has been received from it.
+
+        :param source: Address of the controller.
+        :param chan_ident: Channel, or None for messages not specific to a channel.
+        """
+        return self._states.get((source, chan_ident))
+
+    def __getitem__(self, key: Tuple[int, Optional[int]]) -> DeviceState:
+        return self._states[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self._states
+
+    def __iter__(self) -> Iterator[Tuple[int, Optional[int]]]:
+        return iter(self._states)
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def items(self):
+        return self._states.items()
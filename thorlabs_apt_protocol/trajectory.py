@@ -0,0 +1,136 @@
+"""
+Streaming upload of synchronized move trajectories (``mot_set_movesyncharray``).
+"""
+
+__all__ = ["UploadReport", "TrajectoryUploader"]
+
+from collections import namedtuple
+import itertools
+import time
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from . import functions
+from .pacing import LinkPacer
+from .unpacker import MAX_DATA_LENGTH
+
+UploadReport = namedtuple(
+    "UploadReport", ["points", "frames", "bytes", "seconds", "points_per_second"]
+)
+UploadReport.__doc__ = "Progress of a trajectory upload."
+
+# array_id, channels, num_points and start_ix precede the points in each message
+_ARRAY_HEADER_SIZE = 8
+
+
+class TrajectoryUploader:
+    """
+    Upload a trajectory of any length to a controller, in as few messages as possible.
+
+    Each point is a sequence of a time followed by one position for each channel in
+    ``channels`` (a bit mask, lowest bit first).
+    Points are read lazily from any iterable (a generator, or the rows of an array), and
+    packed into ``mot_set_movesyncharray`` messages of up to ``MAX_DATA_LENGTH`` bytes of
+    data, each with the index of its first point as ``start_ix``.
+
+    Messages are paced to the throughput of the link (see ``LinkPacer``) so that they
+    are not queued faster than the controller receives them, and the number of points
+    is limited to ``max_points``, the capacity of the controller.
+
+    :param write: Callable writing bytes to the controller, such as ``Serial.write``.
+    :param dest: Address of the controller.
+    :param source: Address of the host.
+    :param array_id: Trajectory array to fill.
+    :param channels: Bit mask of the channels in each point.
+    :param baudrate: Speed of the link, in bits per second; None to not pace messages.
+    :param max_points: Number of points the controller can store, or None if unknown.
+    :param on_progress: Callable taking an ``UploadReport`` after each message.
+    :param clock: Callable returning the current time, in seconds.
+    :param sleep: Callable sleeping for a number of seconds.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[bytes], object],
+        dest: int,
+        source: int = 0x01,
+        array_id: int = 0,
+        channels: int = 0x1,
+        baudrate: Optional[float] = 115200,
+        max_points: Optional[int] = None,
+        on_progress: Optional[Callable[[UploadReport], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], object] = time.sleep,
+    ):
+        self.write = write
+        self.dest = dest
+        self.source = source
+        self.array_id = array_id
+        self.channels = channels
+        self.values_per_point = 1 + bin(channels).count("1")
+        self.points_per_frame = (MAX_DATA_LENGTH - _ARRAY_HEADER_SIZE) // (
+            4 * self.values_per_point
+        )
+        self.baudrate = baudrate
+        self.max_points = max_points
+        self.on_progress = on_progress
+        self.clock = clock
+        self.sleep = sleep
+
+    def upload(
+        self, points: Iterable[Sequence[int]], start_ix: int = 0
+    ) -> UploadReport:
+        """
+        Send every point, returning once the last message is written.
+
+        :param points: Iterable of points, each a time and one position per channel.
+        :param start_ix: Index in the controller array of the first point.
+        :returns: Totals of the upload.
+        """
+        iterator = iter(points)
+        start = self.clock()
+        link = LinkPacer(self.baudrate)
+        report = UploadReport(0, 0, 0, 0.0, 0.0)
+        index = start_ix
+        while True:
+            chunk = list(itertools.islice(iterator, self.points_per_frame))
+            if not chunk:
+                return report
+            if self.max_points is not None and index + len(chunk) > self.max_points:
+                raise ValueError(
+                    f"Trajectory exceeds the {self.max_points} points of the controller"
+                )
+            time_pos: List[int] = []
+            for i, point in enumerate(chunk, index):
+                if len(point) != self.values_per_point:
+                    raise ValueError(
+                        f"Point {i} has {len(point)} values, "
+                        f"expected {self.values_per_point}"
+                    )
+                time_pos.extend(point)
+            frame = functions.mot_set_movesyncharray(
+                self.dest,
+                self.source,
+                self.array_id,
+                self.channels,
+                len(chunk),
+                index,
+                time_pos,
+            )
+            self.write(frame)
+            index += len(chunk)
+            now = self.clock()
+            # Wait until the link has sent the message before queueing another
+            sent = link.send(len(frame), now)
+            if sent > now:
+                self.sleep(sent - now)
+                now = self.clock()
+            seconds = now - start
+            report = UploadReport(
+                report.points + len(chunk),
+                report.frames + 1,
+                report.bytes + len(frame),
+                seconds,
+                (report.points + len(chunk)) / seconds if seconds > 0 else 0.0,
+            )
+            if self.on_progress is not None:
+                self.on_progress(report)
@@ -0,0 +1,199 @@
+"""
+Conversion between device units and physical units for motor controllers.
+
+Positions are sent to and from controllers in encoder counts (or microsteps), and
+velocities and accelerations as integers scaled by factors depending on the type of
+controller.
+A ``UnitConverter`` holds the scale factors of one axis, derived once from the number of
+counts per physical unit (mm or degree) of the stage and the controller type, and
+converts scalars, numpy arrays, decoded messages and the columns of decoded captures.
+"""
+
+__all__ = [
+    "CONTROLLER_TYPES",
+    "MODEL_TYPES",
+    "MESSAGE_QUANTITIES",
+    "controller_type",
+    "UnitConverter",
+]
+
+import numbers
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # type: ignore[assignment]
+
+CONTROLLER_TYPES: Dict[str, Tuple[float, float]] = {
+    # Velocity and acceleration factors: device value = counts per unit * factor * value
+    "dc": (65536 * 2048 / 6e6, 65536 * (2048 / 6e6) ** 2),  # T = 2048 / 6e6 s
+    "brushless": (65536 * 102.4e-6, 65536 * 102.4e-6**2),  # T = 102.4 us
+    "stepper": (53.68, 1 / 90.9),
+}
+"""Velocity and acceleration scale factors of each type of controller."""
+
+MODEL_TYPES: Dict[str, str] = {
+    "TDC001": "dc",
+    "KDC101": "dc",
+    "TBD001": "brushless",
+    "KBD101": "brushless",
+    "BBD10": "brushless",
+    "BBD20": "brushless",
+    "BBD30": "brushless",
+    "KST101": "stepper",
+    "KST201": "stepper",
+    "BSC20": "stepper",
+    "K10CR1": "stepper",
+    "LTS": "stepper",
+}
+"""Controller type of each model number (or model number prefix)."""
+
+MESSAGE_QUANTITIES: Dict[str, Dict[str, str]] = {
+    "mot_get_velparams": {
+        "min_velocity": "velocity",
+        "max_velocity": "velocity",
+        "acceleration": "acceleration",
+    },
+    "mot_get_jogparams": {
+        "step_size": "position",
+        "min_velocity": "velocity",
+        "max_velocity": "velocity",
+        "acceleration": "acceleration",
+    },
+    "mot_get_homeparams": {
+        "home_velocity": "velocity",
+        "offset_distance": "position",
+    },
+    "mot_get_genmoveparams": {"backlash_distance": "position"},
+    "mot_get_moverelparams": {"relative_distance": "position"},
+    "mot_get_moveabsparams": {"absolute_position": "position"},
+    "mot_get_limswitchparams": {
+        "cw_softlimit": "position",
+        "ccw_softlimit": "position",
+    },
+    "mot_get_buttonparams": {"position1": "position", "position2": "position"},
+    "mot_get_poscounter": {"position": "position"},
+    "mot_get_enccounter": {"encoder_count": "position"},
+    "mot_get_statusupdate": {"position": "position", "enc_count": "position"},
+    # The velocity of status updates is not scaled as velocity parameters are
+    "mot_get_dcstatusupdate": {"position": "position"},
+    "mot_move_completed": {"position": "position"},
+    "mot_move_stopped": {"position": "position"},
+}
+"""Physical quantity of each field in device units, by message name."""
+
+
+def controller_type(model_number) -> str:
+    """
+    Controller type of a model number, as given by ``hw_get_info``.
+
+    :param model_number: Model number, as bytes (zero padded) or str.
+    """
+    if isinstance(model_number, bytes):
+        model_number = model_number.split(b"\x00")[0].decode("ascii", "replace")
+    for prefix, type_ in MODEL_TYPES.items():
+        if model_number.startswith(prefix):
+            return type_
+    raise KeyError(f"Unknown controller model {model_number!r}")
+
+
+def _numpy():
+    if np is None:
+        raise ImportError("numpy is required to convert arrays")
+    return np
+
+
+class UnitConverter:
+    """
+    Convert the values of one axis between device units and physical units.
+
+    Scalars are converted to scalars (device values rounded to integers); anything else
+    (sequences, numpy arrays) is converted in a single numpy operation, with device
+    values as int64 arrays, physical values as float arrays.
+
+    :param counts_per_unit: Encoder counts (or microsteps) per physical unit of the stage.
+    :param controller: Controller type, one of the keys of ``CONTROLLER_TYPES``.
+    """
+
+    def __init__(self, counts_per_unit: float, controller: str):
+        velocity, acceleration = CONTROLLER_TYPES[controller]
+        self.counts_per_unit = counts_per_unit
+        self.controller = controller
+        # Device units per physical unit, by quantity
+        self.scales = {
+            "position": counts_per_unit,
+            "velocity": counts_per_unit * velocity,
+            "acceleration": counts_per_unit * acceleration,
+        }
+
+    @classmethod
+    def from_messages(
+        cls, info, stageaxisparams=None, counts_per_unit: Optional[float] = None
+    ) -> "UnitConverter":
+        """
+        Build a converter from the decoded messages describing an axis.
+
+        :param info: Decoded ``hw_get_info`` of the controller, giving its type.
+        :param stageaxisparams: Decoded ``mot_get_stageaxisparams`` of the axis, giving
+            its counts per unit.
+        :param counts_per_unit: Counts per unit, for stages which do not report it.
+        """
+        if counts_per_unit is None:
+            if stageaxisparams is None:
+                raise ValueError("One of stageaxisparams and counts_per_unit is needed")
+            counts_per_unit = stageaxisparams.counts_per_unit
+        return cls(counts_per_unit, controller_type(info.model_number))
+
+    def to_device(self, value, quantity: str = "position"):
+        """
+        Convert physical values to device units.
+
+        :param value: Value or array of values in physical units (per second, per second
+            squared for velocities and accelerations).
+        :param quantity: One of ``position``, ``velocity`` or ``acceleration``.
+        """
+        scale = self.scales[quantity]
+        if isinstance(value, numbers.Real):
+            return int(round(float(value) * scale))
+        numpy = _numpy()
+        return numpy.rint(numpy.asarray(value, dtype=float) * scale).astype(numpy.int64)
+
+    def to_physical(self, value, quantity: str = "position"):
+        """
+        Convert device values to physical units.
+
+        :param value: Value or array of values in device units.
+        :param quantity: One of ``position``, ``velocity`` or ``acceleration``.
+        """
+        scale = self.scales[quantity]
+        if isinstance(value, numbers.Real):
+            return value / scale
+        return _numpy().asarray(value, dtype=float) / scale
+
+    def message_to_physical(self, msg) -> Dict[str, Any]:
+        """
+        The fields of a decoded message, with those in device units converted.
+
+        :param msg: Decoded message.
+        """
+        fields = msg._asdict()
+        for name, quantity in MESSAGE_QUANTITIES.get(msg.msg, {}).items():
+            if fields.get(name) is not None:
+                fields[name] = self.to_physical(fields[name], quantity)
+        return fields
+
+    def table_to_physical(self, table: Dict[str, list]) -> Dict[str, Any]:
+        """
+        The columns of a decoded table (see ``capture``), with those in device units
+        converted to float arrays (missing values become NaN).
+
+        :param table: Table of one message id.
+        """
+        out = dict(table)
+        if not table.get("msg"):
+            return out
+        for name, quantity in MESSAGE_QUANTITIES.get(table["msg"][0], {}).items():
+            if name in out:
+                out[name] = self.to_physical(out[name], quantity)
+        return out
@@ -1,4 +1,4 @@
-__all__ = ["Unpacker"]
+__all__ = ["Unpacker", "RawFrame", "decode"]
 
 import asyncio
 from collections import namedtuple
@@ -6,7 +6,70 @@ import io
 import struct
 import warnings
 
-from .parsing import id_to_func
+from .fastpath import decoders, stamped_decoders
+from .messages import message_class
+from .parsing import HEADER_SIZE, id_to_func
+
+VALID_DESTS = frozenset((0x00, 0x01))
+"""Destination addresses accepted for incoming messages (the host)."""
+
+VALID_SOURCES = frozenset(
+    (0x00, 0x11, 0x21, 0x22, 0x23, 0x24, 0x25, 0x26, 0x27, 0x28, 0x29, 0x2A, 0x50)
+)
+"""Source addresses accepted for incoming messages."""
+
+MAX_DATA_LENGTH = 255
+"""Longest data packet accepted in a long form message."""
+
+
+class RawFrame(
+    namedtuple("RawFrame", ["msgid", "source", "dest", "data", "timestamp"])
+):
+    """
+    A validated but undecoded message, as returned by an ``Unpacker`` with ``raw=True``.
+
+    ``data`` is a memoryview of the complete message including its header (short form
+    messages carry their parameters in the header), and ``body`` a view of just the data
+    packet.
+    ``timestamp`` is the receive time if the ``Unpacker`` has a clock, otherwise None.
+
+    Pass the frame to ``decode()`` to parse it.
+    To send frames to another process, replace the view with bytes first:
+    ``frame._replace(data=bytes(frame.data))``.
+    """
+
+    __slots__ = ()
+
+    @property
+    def body(self):
+        return self.data[HEADER_SIZE:]
+
+
+def _decode(msgid, data, timestamp):
+    # Decode the message contents, with a generated decoder if there is one
+    if timestamp is None:
+        generated = decoders.get(msgid)
+        if generated is not None:
+            return generated(data)
+        dict_ = id_to_func[msgid](data)
+    else:
+        generated = stamped_decoders.get(msgid)
+        if generated is not None:
+            return generated(data, timestamp)
+        dict_ = id_to_func[msgid](data)
+        dict_["timestamp"] = timestamp
+    # msg and msgid (the first two entries) are class attributes of the message
+    values = tuple(dict_.values())
+    return message_class(msgid, tuple(dict_)[2:])(*values[2:])
+
+
+def decode(frame: RawFrame):
+    """
+    Decode a ``RawFrame`` into a message, exactly as a non-raw ``Unpacker`` would have.
+
+    :param frame: Frame returned by an ``Unpacker`` with ``raw=True``.
+    """
+    return _decode(frame.msgid, frame.data, frame.timestamp)
 
 
 class Unpacker:
@@ -23,17 +86,51 @@ class Unpacker:
     To instead immediately abort the stream decoding and raise a ``RuntimeError``, set to
     ``"raise"``.
 
+    The optional ``frame_filter`` is called with the bytes of each complete message before
+    it is decoded; messages for which it returns False are dropped without decoding.
+    See ``ChangeFilter`` for a filter dropping unchanged status updates.
+
+    Counters of the data read, decoded and discarded are kept as attributes, and a
+    snapshot of all of them is returned by ``metrics()``.
+
+    If a ``clock`` is given (such as ``time.monotonic``), it is called each time data is
+    read, and each message gets a ``timestamp`` field with the time of the read which
+    completed it.
+
+    With ``raw=True``, messages are only framed and validated, not decoded: the Unpacker
+    yields ``RawFrame`` instances which can be decoded later (possibly elsewhere) with
+    ``decode()``.
+
     :param file_like: A file-like object which data can be `read()` from.
     :param on_error: Action to take if invalid data is detected.
+    :param frame_filter: Callable selecting which messages to decode.
+    :param clock: Callable returning the time to record for each read, in seconds (the
+        unit used by ``DeviceStateCache`` and ``Aggregator``).
+    :param raw: Yield undecoded ``RawFrame`` instances.
     """
 
-    def __init__(self, file_like=None, on_error="warn"):
+    def __init__(
+        self, file_like=None, on_error="warn", frame_filter=None, clock=None, raw=False
+    ):
         if file_like is None:
             self._file = io.BytesIO()
         else:
             self._file = file_like
         self.buf = b""
         self.on_error = on_error
+        self.frame_filter = frame_filter
+        self.clock = clock
+        self.raw = raw
+        self._read_time = None
+        # Counters, see metrics()
+        self.bytes_read = 0
+        self.bytes_discarded = 0
+        self.frames_decoded = {}
+        self.frames_filtered = 0
+        self.invalid_msgid = 0
+        self.bad_address = 0
+        self.oversize_length = 0
+        self.short_reads = 0
 
     def __iter__(self):
         return self
@@ -50,16 +147,68 @@ class Unpacker:
             warnings.warn(message)
         # Discard first byte of buffer, it might decode better now...
         self.buf = self.buf[1:]
+        self.bytes_discarded += 1
+
+    def _read(self, size):
+        data = self._file.read(size)
+        if data and self.clock is not None:
+            self._read_time = self.clock()
+        self.bytes_read += len(data)
+        if len(data) < size:
+            self.short_reads += 1
+        return data
+
+    def metrics(self):
+        """
+        Snapshot of the decoding counters.
+
+        ``frames_decoded`` counts the messages returned, by message id.
+        ``frames_filtered`` counts the messages dropped by ``frame_filter``.
+        ``invalid_msgid``, ``bad_address`` and ``oversize_length`` count the errors
+        detected, each of which discards one byte (counted in ``bytes_discarded``).
+        ``short_reads`` counts the reads which returned less data than requested.
+
+        :returns: Dictionary of counter values.
+        """
+        return {
+            "bytes_read": self.bytes_read,
+            "bytes_discarded": self.bytes_discarded,
+            "frames_decoded": dict(self.frames_decoded),
+            "frames_filtered": self.frames_filtered,
+            "invalid_msgid": self.invalid_msgid,
+            "bad_address": self.bad_address,
+            "oversize_length": self.oversize_length,
+            "short_reads": self.short_reads,
+        }
 
     def __next__(self):
-        # Basic message packet is 6 bytes, try to fill buffer to at least that size
-        if len(self.buf) < 6:
-            self.buf += self._file.read(6 - len(self.buf))
-        # Hopefully enough data in buffer now to try to decode a message
-        while len(self.buf) >= 6:
+        while True:
+            msgid, data = self._next_frame()
+            if self.frame_filter is None or self.frame_filter(data):
+                break
+            self.frames_filtered += 1
+        frames = self.frames_decoded
+        frames[msgid] = frames.get(msgid, 0) + 1
+        timestamp = None if self.clock is None else self._read_time
+        if self.raw:
+            return RawFrame(msgid, data[5], data[4] & 0x7F, memoryview(data), timestamp)
+        return _decode(msgid, data, timestamp)
+
+    def _next_frame(self):
+        """Extract the next valid message from the stream, as message id and bytes."""
+        while True:
+            # Basic message packet is 6 bytes, try to fill buffer to at least that size
+            # (also after discarding invalid bytes, there may be more data waiting)
+            if len(self.buf) < 6:
+                self.buf += self._read(6 - len(self.buf))
+                if len(self.buf) < 6:
+                    # Not enough data to form a message packet
+                    raise StopIteration
+            # Enough data in buffer now to try to decode a message
             # Look at first two bytes and ensure they look like a message ID we recognise
             msgid, length = struct.unpack_from("<HH", self.buf)
             if msgid not in id_to_func:
+                self.invalid_msgid += 1
                 self._decoding_error(f"Invalid message with id={msgid:#06x}")
                 continue
             # Looks like a message, now check the source and destination locations
@@ -67,25 +216,8 @@ class Unpacker:
             dest = self.buf[4] & ~0x80  # Destination is remaining lower bits
             source = self.buf[5]
             # Destination should be the Host, source should be a recognised controller ID
-            if not (
-                dest in (0x00, 0x01)
-                and source
-                in (
-                    0x00,
-                    0x11,
-                    0x21,
-                    0x22,
-                    0x23,
-                    0x24,
-                    0x25,
-                    0x26,
-                    0x27,
-                    0x28,
-                    0x29,
-                    0x2A,
-                    0x50,
-                )
-            ):
+            if not (dest in VALID_DESTS and source in VALID_SOURCES):
+                self.bad_address += 1
                 self._decoding_error(
                     "Invalid source or destination for message with id="
                     f"{msgid:#06x}, src={source:#04x}, dest={dest:#04x}"
@@ -95,7 +227,8 @@ class Unpacker:
             if long_form:
                 # A bad or malicious packet could make us try to read up to 65 kB...
                 # Documentation says "currently no datapacket exceeds 255 bytes in length"
-                if length > 255:
+                if length > MAX_DATA_LENGTH:
+                    self.oversize_length += 1
                     self._decoding_error(
                         f"Invalid length={length} for message with "
                         f"id={msgid:#06x}, src={source:#04x}, dest={dest:#04x}"
@@ -107,15 +240,11 @@ class Unpacker:
             # Either short form message, or long form message of reasonable size
             # Looks good! Break from loop and proceed
             break
-        # If we got here, either the buffer was/shrank too small,
-        # or we have the start of something that looks like a valid message
-        if len(self.buf) < 6:
-            # Not enough data to form a message packet
-            raise StopIteration
+        # If we got here, we have the start of something that looks like a valid message
         # Buffer contains enough for a short message, but maybe not a long form one
         if len(self.buf) < length + 6:
             # Not enough data in buffer to decode long form message, attempt to read some more data
-            self.buf += self._file.read(length - len(self.buf) + 6)
+            self.buf += self._read(length - len(self.buf) + 6)
             if len(self.buf) < length + 6:
                 # Still didn't receive enough data to decode message
                 raise StopIteration
@@ -123,9 +252,7 @@ class Unpacker:
         data = self.buf[: length + 6]
         # Can now remove the message data from the buffer
         self.buf = self.buf[length + 6 :]
-        # Decode the message contents
-        dict_ = id_to_func[msgid](data)
-        return namedtuple(dict_["msg"], dict_.keys())(**dict_)
+        return msgid, data
 
     def __aiter__(self):
         return self
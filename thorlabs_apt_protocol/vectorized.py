@@ -0,0 +1,106 @@
+"""
+Encoders building the same command for many devices at once.
+
+Each function takes the same arguments as its counterpart in ``functions``, but ``dest``,
+``chan_ident`` and the values may be arrays (or anything numpy can broadcast together).
+One message is built for each element of the broadcast arguments, in C order, by
+filling a single structured array, and all of them are returned as one ``bytes``
+object ready to write to the port.
+
+Requires numpy.
+"""
+
+__all__ = [
+    "mot_move_relative",
+    "mot_move_absolute",
+    "pz_set_outputvolts",
+    "pz_set_outputpos",
+    "quad_set_positionoutputs",
+]
+
+import functools
+from typing import Any, List, Tuple
+
+import numpy as np
+
+from .parsing import HEADER_SIZE
+
+_HEADER = [("msgid", "<u2"), ("length", "<u2"), ("dest", "u1"), ("source", "u1")]
+
+
+@functools.lru_cache(maxsize=None)
+def _dtype(fields: Tuple[Tuple[str, str], ...]) -> np.dtype:
+    return np.dtype(_HEADER + list(fields))
+
+
+def _pack(msgid: int, dest, source: int, fields: List[Tuple[str, str, Any]]) -> bytes:
+    # fields are (name, dtype, values), in message order
+    dtype = _dtype(tuple((name, type_) for name, type_, _ in fields))
+    columns = np.broadcast_arrays(dest, *(values for _, _, values in fields))
+    if columns[0].size == 0:
+        # Empty lists are float arrays to numpy, but there is nothing to check
+        return b""
+    out = np.empty(columns[0].size, dtype)
+    out["msgid"] = msgid
+    out["length"] = dtype.itemsize - HEADER_SIZE
+    out["dest"] = _checked("dest", columns[0], "u1") | 0x80
+    out["source"] = source
+    for (name, type_, _), column in zip(fields, columns[1:]):
+        out[name] = _checked(name, column, type_).ravel()
+    return out.tobytes()
+
+
+def _checked(name: str, values: np.ndarray, type_: str) -> np.ndarray:
+    # Refuse what struct.pack would refuse, rather than silently wrapping around
+    if not np.issubdtype(values.dtype, np.integer):
+        raise TypeError(f"{name} must be integers, not {values.dtype}")
+    if values.size:
+        info = np.iinfo(type_)
+        if values.min() < info.min or values.max() > info.max:
+            raise ValueError(f"{name} out of range for {np.dtype(type_)}")
+    return values.ravel()
+
+
+def mot_move_relative(dest, source: int, chan_ident, distance) -> bytes:
+    return _pack(
+        0x0448,
+        dest,
+        source,
+        [("chan_ident", "<u2", chan_ident), ("distance", "<i4", distance)],
+    )
+
+
+def mot_move_absolute(dest, source: int, chan_ident, position) -> bytes:
+    return _pack(
+        0x0453,
+        dest,
+        source,
+        [("chan_ident", "<u2", chan_ident), ("position", "<i4", position)],
+    )
+
+
+def pz_set_outputvolts(dest, source: int, chan_ident, voltage) -> bytes:
+    return _pack(
+        0x0643,
+        dest,
+        source,
+        [("chan_ident", "<u2", chan_ident), ("voltage", "<i2", voltage)],
+    )
+
+
+def pz_set_outputpos(dest, source: int, chan_ident, position) -> bytes:
+    return _pack(
+        0x0646,
+        dest,
+        source,
+        [("chan_ident", "<u2", chan_ident), ("position", "<u2", position)],
+    )
+
+
+def quad_set_positionoutputs(dest, source: int, x_pos, y_pos) -> bytes:
+    return _pack(
+        0x0870,
+        dest,
+        source,
+        [("submsgid", "<u2", 0xD), ("x_pos", "<i2", x_pos), ("y_pos", "<i2", y_pos)],
+    )